@@ -5,6 +5,21 @@ import sqlite3
 from pathlib import Path
 from typing import Any
 
+import orjson
+
+
+def _dumps_details(details: dict[str, Any]) -> str:
+    """Serialise prediction ``details`` for the ``details_json`` column.
+
+    Unlike ``json.dumps``, NaN/Infinity are written as ``null`` so the
+    column stays valid JSON, and numpy scalars and arrays are written as
+    plain numbers.  Non-string keys are stringified as ``json`` does.
+    """
+    return orjson.dumps(
+        details, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
 DB_PATH = Path(__file__).resolve().parent.parent / "data" / "database.sqlite"
 
 
@@ -162,7 +177,7 @@ def insert_prediction(snapshot_date: str, row: dict[str, Any]) -> None:
                 row.get("live_total"),
                 row.get("simulation_runs", 10000),
                 row.get("odds_source", "NONE"),
-                json.dumps(row.get("details", {}), ensure_ascii=False),
+                _dumps_details(row.get("details", {})),
             ),
         )
 
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import math
+
 import numpy as np
 
 # League-wide average parameters
@@ -30,6 +32,8 @@ def run_possession_simulation(
     spread_line: float,
     n_sim: int = 10000,
 ) -> dict[str, float]:
+    if n_sim < 1:
+        raise ValueError(f"n_sim must be at least 1, got {n_sim}")
     seed = int(game_id) % 1_000_000
     rng = np.random.default_rng(seed)
 
@@ -43,13 +47,17 @@ def run_possession_simulation(
     totals = home_scores + away_scores
     margins = home_scores - away_scores
 
+    # Variances are computed once and reused for the std figures below.
+    total_var = float(np.var(totals))
+    margin_var = float(np.var(margins))
+
     # Standard deviation capped at MAX_TOTAL_STD
-    total_std = float(np.std(totals))
+    total_std = math.sqrt(total_var)
     if total_std > MAX_TOTAL_STD:
         total_std = MAX_TOTAL_STD
 
     # Probability calculation from simulation counts
-    over_probability = float(np.mean(totals > closing_total))
+    over_probability = np.count_nonzero(totals > closing_total) / n_sim
     under_probability = 1.0 - over_probability
 
     # Edge calculation
@@ -64,16 +72,15 @@ def run_possession_simulation(
     total_95pct = predicted_total + Z_SCORE_90PCT * total_std
 
     # Spread and margin statistics
-    spread_cover_prob = float(np.mean(margins + spread_line > 0))
+    spread_cover_prob = np.count_nonzero(margins + spread_line > 0) / n_sim
     margin_mean = float(np.mean(margins))
-    margin_std = float(np.std(margins))
-    total_mean = float(np.mean(totals))
+    margin_std = math.sqrt(margin_var)
 
-    variance = float(np.var(totals) + np.var(margins))
-    home_win_prob = float(np.mean(margins > 0))
+    variance = total_var + margin_var
+    home_win_prob = np.count_nonzero(margins > 0) / n_sim
 
-    spread_5pct = float(np.percentile(margins, 5))
-    spread_95pct = float(np.percentile(margins, 95))
+    # One partition pass for both tails.
+    spread_5pct, spread_95pct = (float(v) for v in np.percentile(margins, (5, 95)))
 
     return {
         "predicted_total": predicted_total,
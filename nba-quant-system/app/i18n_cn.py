@@ -65,5 +65,5 @@ def cn(key: str, **kwargs: object) -> str:
     """
     template = _STRINGS.get(key, key)
     if kwargs:
-        return template.format(**kwargs)
+        return template.format_map(kwargs)
     return template
@@ -217,353 +217,356 @@ def run_prediction(target_date: str | None = None) -> None:
     telegram_count = 0
     game_results: list[dict] = []  # Collect per-game data for core pick selection
 
-    for idx, g in enumerate(games):
-        game_id = g["id"]
-        home = g["home_team"]
-        vis = g["visitor_team"]
-
-        opening_spread = None
-        live_spread = None
-        opening_total = None
-        live_total = None
-        odds_source = "NONE"
-
-        # --- PRIMARY: the-odds-api.com ---
-        matched_event = _match_primary_odds(
-            primary_odds, home.get("full_name", ""), vis.get("full_name", "")
-        )
-        if matched_event:
-            opening = extract_opening_line(matched_event)
-            live = extract_live_line(matched_event)
-            if opening.get("home_spread") is not None and opening.get("total_points") is not None:
-                opening_spread = float(opening["home_spread"])
-                opening_total = float(opening["total_points"])
-                live_spread = float(live["home_spread"]) if live.get("home_spread") is not None else opening_spread
-                live_total = float(live["total_points"]) if live.get("total_points") is not None else opening_total
-                odds_source = "PRIMARY"
-                logger.info("Odds Source: PRIMARY (game %s)", game_id)
-
-        # --- FALLBACK: balldontlie betting_odds ---
-        if odds_source == "NONE":
-            try:
-                odds_data = client.betting_odds(game_ids=game_id, per_page=100)
-                logger.info("Odds API debug | game_id=%s | provider_count=%d | response_length=%d",
-                            game_id, len(odds_data), len(str(odds_data)))
-                opening_payload = {"data": odds_data}
-                live_payload = {"data": odds_data}
-                store_opening_and_live(game_id, opening_payload, live_payload)
-                o_spread, o_total, _ = parse_main_market(opening_payload)
-                l_spread, l_total, _ = parse_main_market(live_payload)
-                if o_spread is not None and o_total is not None:
-                    opening_spread = o_spread
-                    opening_total = o_total
-                    live_spread = l_spread if l_spread is not None else o_spread
-                    live_total = l_total if l_total is not None else o_total
-                    odds_source = "BALLDONTLIE"
-                    logger.info("Odds Source: BALLDONTLIE (game %s)", game_id)
-            except Exception:
-                logger.warning("betting_odds unavailable for game %s", game_id, exc_info=True)
-
-        if odds_source != "NONE":
-            odds_valid_count += 1
-
-        logger.info("Loaded odds for game %s (source: %s)", game_id, odds_source)
-        logger.info("  Opening Spread: %s", opening_spread)
-        logger.info("  Live Spread: %s", live_spread)
-        logger.info("  Opening Total: %s", opening_total)
-        logger.info("  Live Total: %s", live_total)
-
-        # --- Build features and predict scores ---
-        feat = _build_prediction_features(home["id"], vis["id"])
-
-        predicted_home_score = float(model_bundle.home_score_model.predict(feat)[0])
-        predicted_away_score = float(model_bundle.away_score_model.predict(feat)[0])
-
-        # --- Model input upgrade: blend last-10 and season ratings ---
-        feat_row = feat.iloc[0]
-        season_home_off = float(feat_row.get("home_off_rating", 110.0))
-        season_away_off = float(feat_row.get("away_off_rating", 110.0))
-        season_home_def = float(feat_row.get("home_def_rating", 110.0))
-        season_away_def = float(feat_row.get("away_def_rating", 110.0))
-        season_home_pace = float(feat_row.get("home_pace", 98.0))
-        season_away_pace = float(feat_row.get("away_pace", 98.0))
-
-        home_avg10 = float(feat_row.get("home_avg_score_last10", predicted_home_score))
-        home_allowed10 = float(feat_row.get("home_avg_allowed_last10", predicted_away_score))
-        away_avg10 = float(feat_row.get("away_avg_score_last10", predicted_away_score))
-        away_allowed10 = float(feat_row.get("away_avg_allowed_last10", predicted_home_score))
-
-        last10_home_pace = (home_avg10 + home_allowed10) / 2.14
-        last10_away_pace = (away_avg10 + away_allowed10) / 2.14
-
-        last10_home_off = (home_avg10 / max(last10_home_pace, MIN_PACE_DIVISOR)) * 100.0
-        last10_away_off = (away_avg10 / max(last10_away_pace, MIN_PACE_DIVISOR)) * 100.0
-        last10_home_def = (home_allowed10 / max(last10_home_pace, MIN_PACE_DIVISOR)) * 100.0
-        last10_away_def = (away_allowed10 / max(last10_away_pace, MIN_PACE_DIVISOR)) * 100.0
-
-        # Blended ratings: 0.6 last-10 + 0.4 season
-        home_off = RECENT_WEIGHT * last10_home_off + SEASON_WEIGHT * season_home_off
-        away_off = RECENT_WEIGHT * last10_away_off + SEASON_WEIGHT * season_away_off
-        home_def = RECENT_WEIGHT * last10_home_def + SEASON_WEIGHT * season_home_def
-        away_def = RECENT_WEIGHT * last10_away_def + SEASON_WEIGHT * season_away_def
-
-        home_pace_blend = RECENT_WEIGHT * last10_home_pace + SEASON_WEIGHT * season_home_pace
-        away_pace_blend = RECENT_WEIGHT * last10_away_pace + SEASON_WEIGHT * season_away_pace
-
-        # Game pace: simple average clamped to [94, 104]
-        game_pace = (home_pace_blend + away_pace_blend) / 2.0
-        game_pace = max(94.0, min(104.0, game_pace))
-
-        if game_pace > 120:
-            print("WARNING: Pace too high:", game_pace)
-        if game_pace < 80:
-            print("WARNING: Pace too low:", game_pace)
-
-        # Possession model: PPP derived directly from off_rating.
-        # off_rating already embeds offensive efficiency (3P / FT / ORB);
-        # no additional multiplicative adjustment is applied to avoid
-        # double-counting which inflates Predicted Total above 250.
-        home_ppp = home_off / 100.0
-        away_ppp = away_off / 100.0
-
-        if home_ppp > 1.5:
-            print("WARNING: Home PPP abnormal:", home_ppp)
-        if away_ppp > 1.5:
-            print("WARNING: Away PPP abnormal:", away_ppp)
-
-        print("====== MODEL DEBUG ======")
-        print("Home Team:", home["full_name"])
-        print("Away Team:", vis["full_name"])
-        print("Home Pace:", home_pace_blend)
-        print("Away Pace:", away_pace_blend)
-        print("Game Pace:", game_pace)
-        print("Home Off Rating:", home_off)
-        print("Away Off Rating:", away_off)
-        print("Home Def Rating:", home_def)
-        print("Away Def Rating:", away_def)
-        print("Home PPP:", home_ppp)
-        print("Away PPP:", away_ppp)
-        print("=========================")
-
-        # Base predicted total from possession model
-        predicted_total = game_pace * (home_ppp + away_ppp)
-
-        print("Predicted Total:", predicted_total)
-        if predicted_total > 260:
-            print("WARNING: Predicted total extremely high")
-        if predicted_total < 180:
-            print("WARNING: Predicted total extremely low")
-
-        # Keep ML-based margin for spread analysis
-        predicted_margin = predicted_home_score - predicted_away_score
-
-        logger.info("Predicted Home Score: %.1f  Away Score: %.1f", predicted_home_score, predicted_away_score)
-        logger.info("Predicted Margin: %.1f  Total: %.1f", predicted_margin, predicted_total)
-
-        # --- Skip games without valid odds ---
-        if odds_source == "NONE":
-            logger.warning("Odds Source: NONE (game %s) – skipping game (no line available)", game_id)
-            continue
-
-        print("Closing Total Line:", live_total)
-
-        # --- Hybrid: Spread Cover & Total model predictions ---
-        spread_cover_prob_model = None
-        total_over_prob_model = None
-        if model_bundle.spread_cover_model is not None:
-            try:
-                spread_cover_prob_model = float(model_bundle.spread_cover_model.predict_proba(feat)[0][1])
-                logger.info("Spread Cover Model Prob: %.2f%%", spread_cover_prob_model * 100)
-            except Exception:
-                pass
-        if model_bundle.total_model is not None:
-            try:
-                total_over_prob_model = float(model_bundle.total_model.predict_proba(feat)[0][1])
-                logger.info("Total Over Model Prob: %.2f%%", total_over_prob_model * 100)
-            except Exception:
-                pass
-
-        # --- Step 4: Monte Carlo simulation ---
-        sim = run_possession_simulation(
-            game_id=game_id,
-            game_pace=game_pace,
-            home_adj_ppp=home_ppp,
-            away_adj_ppp=away_ppp,
-            predicted_total=predicted_total,
-            closing_total=live_total,
-            spread_line=live_spread,
-            n_sim=MIN_SIMULATION_COUNT,
-        )
-
-        print("Simulation Low:", sim["simulation_low"])
-        print("Simulation High:", sim["simulation_high"])
-        print("Simulation Std:", sim["total_std"])
-        print("Over Probability:", sim["over_probability"])
-        print("Under Probability:", sim["under_probability"])
-        print("=========================")
+    # Supabase rows are buffered for the whole loop and written in bulk.
+    from .supabase_client import batched_writes
+    with batched_writes():
+        for idx, g in enumerate(games):
+            game_id = g["id"]
+            home = g["home_team"]
+            vis = g["visitor_team"]
+
+            opening_spread = None
+            live_spread = None
+            opening_total = None
+            live_total = None
+            odds_source = "NONE"
+
+            # --- PRIMARY: the-odds-api.com ---
+            matched_event = _match_primary_odds(
+                primary_odds, home.get("full_name", ""), vis.get("full_name", "")
+            )
+            if matched_event:
+                opening = extract_opening_line(matched_event)
+                live = extract_live_line(matched_event)
+                if opening.get("home_spread") is not None and opening.get("total_points") is not None:
+                    opening_spread = float(opening["home_spread"])
+                    opening_total = float(opening["total_points"])
+                    live_spread = float(live["home_spread"]) if live.get("home_spread") is not None else opening_spread
+                    live_total = float(live["total_points"]) if live.get("total_points") is not None else opening_total
+                    odds_source = "PRIMARY"
+                    logger.info("Odds Source: PRIMARY (game %s)", game_id)
+
+            # --- FALLBACK: balldontlie betting_odds ---
+            if odds_source == "NONE":
+                try:
+                    odds_data = client.betting_odds(game_ids=game_id, per_page=100)
+                    logger.info("Odds API debug | game_id=%s | provider_count=%d | response_length=%d",
+                                game_id, len(odds_data), len(str(odds_data)))
+                    opening_payload = {"data": odds_data}
+                    live_payload = {"data": odds_data}
+                    store_opening_and_live(game_id, opening_payload, live_payload)
+                    o_spread, o_total, _ = parse_main_market(opening_payload)
+                    l_spread, l_total, _ = parse_main_market(live_payload)
+                    if o_spread is not None and o_total is not None:
+                        opening_spread = o_spread
+                        opening_total = o_total
+                        live_spread = l_spread if l_spread is not None else o_spread
+                        live_total = l_total if l_total is not None else o_total
+                        odds_source = "BALLDONTLIE"
+                        logger.info("Odds Source: BALLDONTLIE (game %s)", game_id)
+                except Exception:
+                    logger.warning("betting_odds unavailable for game %s", game_id, exc_info=True)
+
+            if odds_source != "NONE":
+                odds_valid_count += 1
+
+            logger.info("Loaded odds for game %s (source: %s)", game_id, odds_source)
+            logger.info("  Opening Spread: %s", opening_spread)
+            logger.info("  Live Spread: %s", live_spread)
+            logger.info("  Opening Total: %s", opening_total)
+            logger.info("  Live Total: %s", live_total)
+
+            # --- Build features and predict scores ---
+            feat = _build_prediction_features(home["id"], vis["id"])
+
+            predicted_home_score = float(model_bundle.home_score_model.predict(feat)[0])
+            predicted_away_score = float(model_bundle.away_score_model.predict(feat)[0])
+
+            # --- Model input upgrade: blend last-10 and season ratings ---
+            feat_row = feat.iloc[0]
+            season_home_off = float(feat_row.get("home_off_rating", 110.0))
+            season_away_off = float(feat_row.get("away_off_rating", 110.0))
+            season_home_def = float(feat_row.get("home_def_rating", 110.0))
+            season_away_def = float(feat_row.get("away_def_rating", 110.0))
+            season_home_pace = float(feat_row.get("home_pace", 98.0))
+            season_away_pace = float(feat_row.get("away_pace", 98.0))
+
+            home_avg10 = float(feat_row.get("home_avg_score_last10", predicted_home_score))
+            home_allowed10 = float(feat_row.get("home_avg_allowed_last10", predicted_away_score))
+            away_avg10 = float(feat_row.get("away_avg_score_last10", predicted_away_score))
+            away_allowed10 = float(feat_row.get("away_avg_allowed_last10", predicted_home_score))
+
+            last10_home_pace = (home_avg10 + home_allowed10) / 2.14
+            last10_away_pace = (away_avg10 + away_allowed10) / 2.14
+
+            last10_home_off = (home_avg10 / max(last10_home_pace, MIN_PACE_DIVISOR)) * 100.0
+            last10_away_off = (away_avg10 / max(last10_away_pace, MIN_PACE_DIVISOR)) * 100.0
+            last10_home_def = (home_allowed10 / max(last10_home_pace, MIN_PACE_DIVISOR)) * 100.0
+            last10_away_def = (away_allowed10 / max(last10_away_pace, MIN_PACE_DIVISOR)) * 100.0
+
+            # Blended ratings: 0.6 last-10 + 0.4 season
+            home_off = RECENT_WEIGHT * last10_home_off + SEASON_WEIGHT * season_home_off
+            away_off = RECENT_WEIGHT * last10_away_off + SEASON_WEIGHT * season_away_off
+            home_def = RECENT_WEIGHT * last10_home_def + SEASON_WEIGHT * season_home_def
+            away_def = RECENT_WEIGHT * last10_away_def + SEASON_WEIGHT * season_away_def
+
+            home_pace_blend = RECENT_WEIGHT * last10_home_pace + SEASON_WEIGHT * season_home_pace
+            away_pace_blend = RECENT_WEIGHT * last10_away_pace + SEASON_WEIGHT * season_away_pace
+
+            # Game pace: simple average clamped to [94, 104]
+            game_pace = (home_pace_blend + away_pace_blend) / 2.0
+            game_pace = max(94.0, min(104.0, game_pace))
+
+            if game_pace > 120:
+                print("WARNING: Pace too high:", game_pace)
+            if game_pace < 80:
+                print("WARNING: Pace too low:", game_pace)
+
+            # Possession model: PPP derived directly from off_rating.
+            # off_rating already embeds offensive efficiency (3P / FT / ORB);
+            # no additional multiplicative adjustment is applied to avoid
+            # double-counting which inflates Predicted Total above 250.
+            home_ppp = home_off / 100.0
+            away_ppp = away_off / 100.0
+
+            if home_ppp > 1.5:
+                print("WARNING: Home PPP abnormal:", home_ppp)
+            if away_ppp > 1.5:
+                print("WARNING: Away PPP abnormal:", away_ppp)
+
+            print("====== MODEL DEBUG ======")
+            print("Home Team:", home["full_name"])
+            print("Away Team:", vis["full_name"])
+            print("Home Pace:", home_pace_blend)
+            print("Away Pace:", away_pace_blend)
+            print("Game Pace:", game_pace)
+            print("Home Off Rating:", home_off)
+            print("Away Off Rating:", away_off)
+            print("Home Def Rating:", home_def)
+            print("Away Def Rating:", away_def)
+            print("Home PPP:", home_ppp)
+            print("Away PPP:", away_ppp)
+            print("=========================")
+
+            # Base predicted total from possession model
+            predicted_total = game_pace * (home_ppp + away_ppp)
+
+            print("Predicted Total:", predicted_total)
+            if predicted_total > 260:
+                print("WARNING: Predicted total extremely high")
+            if predicted_total < 180:
+                print("WARNING: Predicted total extremely low")
+
+            # Keep ML-based margin for spread analysis
+            predicted_margin = predicted_home_score - predicted_away_score
+
+            logger.info("Predicted Home Score: %.1f  Away Score: %.1f", predicted_home_score, predicted_away_score)
+            logger.info("Predicted Margin: %.1f  Total: %.1f", predicted_margin, predicted_total)
+
+            # --- Skip games without valid odds ---
+            if odds_source == "NONE":
+                logger.warning("Odds Source: NONE (game %s) – skipping game (no line available)", game_id)
+                continue
+
+            print("Closing Total Line:", live_total)
+
+            # --- Hybrid: Spread Cover & Total model predictions ---
+            spread_cover_prob_model = None
+            total_over_prob_model = None
+            if model_bundle.spread_cover_model is not None:
+                try:
+                    spread_cover_prob_model = float(model_bundle.spread_cover_model.predict_proba(feat)[0][1])
+                    logger.info("Spread Cover Model Prob: %.2f%%", spread_cover_prob_model * 100)
+                except Exception:
+                    pass
+            if model_bundle.total_model is not None:
+                try:
+                    total_over_prob_model = float(model_bundle.total_model.predict_proba(feat)[0][1])
+                    logger.info("Total Over Model Prob: %.2f%%", total_over_prob_model * 100)
+                except Exception:
+                    pass
+
+            # --- Step 4: Monte Carlo simulation ---
+            sim = run_possession_simulation(
+                game_id=game_id,
+                game_pace=game_pace,
+                home_adj_ppp=home_ppp,
+                away_adj_ppp=away_ppp,
+                predicted_total=predicted_total,
+                closing_total=live_total,
+                spread_line=live_spread,
+                n_sim=MIN_SIMULATION_COUNT,
+            )
 
-        progress.set_game_progress(
-            f"⚙️ Game {idx + 1}/{len(games)}: {zh_name(vis['full_name'])} vs {zh_name(home['full_name'])} ✅"
-        )
+            print("Simulation Low:", sim["simulation_low"])
+            print("Simulation High:", sim["simulation_high"])
+            print("Simulation Std:", sim["total_std"])
+            print("Over Probability:", sim["over_probability"])
+            print("Under Probability:", sim["under_probability"])
+            print("=========================")
 
-        # --- Step 5: Verify simulation count ---
-        sim_count = sim.get("simulation_count", 0)
-        if sim_count < MIN_SIMULATION_COUNT:
-            logger.error("Simulation count %d < %d for game %s — aborting", sim_count, MIN_SIMULATION_COUNT, game_id)
-            sys.exit(1)
-        logger.info("Simulation runs: %d (game_id=%s)", sim_count, game_id)
-
-        # --- Hybrid spread decision: combine Monte Carlo + classifier ---
-        mc_spread_prob = sim["spread_cover_probability"]
-        if spread_cover_prob_model is not None:
-            combined_spread_prob = MC_WEIGHT * mc_spread_prob + CLASSIFIER_WEIGHT * spread_cover_prob_model
-        else:
-            combined_spread_prob = mc_spread_prob
+            progress.set_game_progress(
+                f"⚙️ Game {idx + 1}/{len(games)}: {zh_name(vis['full_name'])} vs {zh_name(home['full_name'])} ✅"
+            )
 
-        if predicted_margin > -live_spread:
-            spread_pick = f"主队 {zh_name(home['full_name'])} {live_spread:+.1f}"
-            spread_pick_label = "home_cover"
-        else:
-            spread_pick = f"客队 {zh_name(vis['full_name'])} {-live_spread:+.1f}（受让）"
-            spread_pick_label = "away_cover"
+            # --- Step 5: Verify simulation count ---
+            sim_count = sim.get("simulation_count", 0)
+            if sim_count < MIN_SIMULATION_COUNT:
+                logger.error("Simulation count %d < %d for game %s — aborting", sim_count, MIN_SIMULATION_COUNT, game_id)
+                sys.exit(1)
+            logger.info("Simulation runs: %d (game_id=%s)", sim_count, game_id)
+
+            # --- Hybrid spread decision: combine Monte Carlo + classifier ---
+            mc_spread_prob = sim["spread_cover_probability"]
+            if spread_cover_prob_model is not None:
+                combined_spread_prob = MC_WEIGHT * mc_spread_prob + CLASSIFIER_WEIGHT * spread_cover_prob_model
+            else:
+                combined_spread_prob = mc_spread_prob
 
-        # --- Hybrid total decision: combine Monte Carlo + classifier ---
-        mc_total_prob = sim["over_probability"]
-        if total_over_prob_model is not None:
-            combined_total_prob = MC_WEIGHT * mc_total_prob + CLASSIFIER_WEIGHT * total_over_prob_model
-        else:
-            combined_total_prob = mc_total_prob
+            if predicted_margin > -live_spread:
+                spread_pick = f"主队 {zh_name(home['full_name'])} {live_spread:+.1f}"
+                spread_pick_label = "home_cover"
+            else:
+                spread_pick = f"客队 {zh_name(vis['full_name'])} {-live_spread:+.1f}（受让）"
+                spread_pick_label = "away_cover"
 
-        # --- Probability calibration: shrink toward neutral ---
-        calibrated_total_prob = PROB_RAW_WEIGHT * combined_total_prob + PROB_NEUTRAL_WEIGHT * NEUTRAL_PROBABILITY
-        combined_total_prob = calibrated_total_prob
+            # --- Hybrid total decision: combine Monte Carlo + classifier ---
+            mc_total_prob = sim["over_probability"]
+            if total_over_prob_model is not None:
+                combined_total_prob = MC_WEIGHT * mc_total_prob + CLASSIFIER_WEIGHT * total_over_prob_model
+            else:
+                combined_total_prob = mc_total_prob
 
-        if predicted_total > live_total:
-            total_pick = "大分"
-        else:
-            total_pick = "小分"
+            # --- Probability calibration: shrink toward neutral ---
+            calibrated_total_prob = PROB_RAW_WEIGHT * combined_total_prob + PROB_NEUTRAL_WEIGHT * NEUTRAL_PROBABILITY
+            combined_total_prob = calibrated_total_prob
 
-        # --- Rating from simulation edge ---
-        spread_rating = compute_spread_rating(combined_spread_prob, live_spread)
-        total_rating = compute_total_rating(combined_total_prob, live_total)
+            if predicted_total > live_total:
+                total_pick = "大分"
+            else:
+                total_pick = "小分"
 
-        spread_edge = combined_spread_prob - 0.5
-        total_edge = combined_total_prob - 0.5
-        market = analyze_line_behavior(opening_spread, live_spread, spread_edge, opening_total, live_total, total_edge)
+            # --- Rating from simulation edge ---
+            spread_rating = compute_spread_rating(combined_spread_prob, live_spread)
+            total_rating = compute_total_rating(combined_total_prob, live_total)
 
-        spread_confidence = spread_rating["spread_confidence"]
-        total_confidence = total_rating["total_confidence"]
-        spread_stars = spread_rating["spread_stars"]
-        total_stars = total_rating["total_stars"]
+            spread_edge = combined_spread_prob - 0.5
+            total_edge = combined_total_prob - 0.5
+            market = analyze_line_behavior(opening_spread, live_spread, spread_edge, opening_total, live_total, total_edge)
 
-        # --- Edge scoring ---
-        overall_edge_raw = max(abs(spread_edge), abs(total_edge)) * 100.0
-        edge_score = compute_edge_score(
-            max(combined_spread_prob, combined_total_prob)
-        )
-        clv_projection = round((live_spread - opening_spread) if opening_spread and live_spread else 0.0, 2)
-
-        # --- Total edge & signal score ---
-        total_edge_pts = predicted_total - live_total
-        abs_edge = abs(total_edge_pts)
-        total_std = sim["total_std"]
-        over_probability = combined_total_prob
-
-        signal_score = (
-            abs_edge * 0.6
-            + over_probability * 40
-            - total_std * 0.2
-        )
+            spread_confidence = spread_rating["spread_confidence"]
+            total_confidence = total_rating["total_confidence"]
+            spread_stars = spread_rating["spread_stars"]
+            total_stars = total_rating["total_stars"]
 
-        # --- Recommendation reason (based on abs_edge) ---
-        if abs_edge >= 8:
-            reason = "模型预测与盘口差距较大"
-        elif abs_edge >= 6:
-            reason = "模型预测存在明显价值"
-        else:
-            reason = "信号较弱，不推荐"
-
-        # --- Step 6: Save prediction to database ---
-        spread_prob = combined_spread_prob
-        total_prob = combined_total_prob
-        overall_confidence = max(abs(spread_edge), abs(total_edge))
-        overall_stars = max(spread_stars, total_stars)
-        recommendation_idx = max(spread_rating["spread_recommendation_index"],
-                                 total_rating["total_recommendation_index"])
-
-        prediction_row = {
-            "game_id": game_id,
-            "home_team": home.get("full_name", ""),
-            "away_team": vis.get("full_name", ""),
-            "prediction_time": datetime.utcnow().isoformat(),
-            "spread_pick": spread_pick,
-            "spread_prob": spread_prob,
-            "total_pick": total_pick,
-            "total_prob": total_prob,
-            "confidence_score": round(overall_confidence, 4),
-            "star_rating": overall_stars,
-            "recommendation_index": recommendation_idx,
-            "expected_home_score": sim["expected_home_score"],
-            "expected_visitor_score": sim["expected_visitor_score"],
-            "simulation_variance": sim["score_distribution_variance"],
-            "opening_spread": opening_spread,
-            "live_spread": live_spread,
-            "opening_total": opening_total,
-            "live_total": live_total,
-            "simulation_runs": sim_count,
-            "odds_source": odds_source,
-            "model_version": model_bundle.version,
-            "feature_count": feature_count,
-            "spread_edge": round(spread_edge, 4),
-            "total_edge": round(total_edge, 4),
-            "edge_score": edge_score,
-            "clv_projection": clv_projection,
-            "home_win_probability": sim.get("home_win_probability", 0.0),
-            "details": {"simulation": sim, "market": market,
-                        "spread_rating": spread_rating, "total_rating": total_rating},
-        }
-
-        insert_prediction(snapshot_date=target_date, row=prediction_row)
-        saved_count += 1
-
-        # --- Supabase persistence (mandatory when configured) ---
-        from .supabase_client import save_prediction, save_simulation_log
-        save_prediction({
-            **prediction_row,
-            "game_date": target_date,
-            "spread_line": live_spread,
-            "total_line": live_total,
-            "spread_confidence": spread_confidence,
-            "total_confidence": total_confidence,
-        })
-        save_simulation_log({
-            "game_id": game_id,
-            "model_version": model_bundle.version,
-            "simulation_runs": sim_count,
-            **sim,
-        })
+            # --- Edge scoring ---
+            overall_edge_raw = max(abs(spread_edge), abs(total_edge)) * 100.0
+            edge_score = compute_edge_score(
+                max(combined_spread_prob, combined_total_prob)
+            )
+            clv_projection = round((live_spread - opening_spread) if opening_spread and live_spread else 0.0, 2)
+
+            # --- Total edge & signal score ---
+            total_edge_pts = predicted_total - live_total
+            abs_edge = abs(total_edge_pts)
+            total_std = sim["total_std"]
+            over_probability = combined_total_prob
+
+            signal_score = (
+                abs_edge * 0.6
+                + over_probability * 40
+                - total_std * 0.2
+            )
 
-        # --- Collect game result for core pick selection ---
-        total_range = f"{int(sim['total_5pct'])} – {int(sim['total_95pct'])}"
-        under_probability = 1.0 - over_probability
-
-        game_results.append({
-            "idx": len(game_results),
-            "game_id": game_id,
-            "home": home,
-            "vis": vis,
-            "live_total": live_total,
-            "predicted_total": predicted_total,
-            "total_edge_pts": total_edge_pts,
-            "over_probability": over_probability,
-            "under_probability": under_probability,
-            "total_range": total_range,
-            "low": sim['total_5pct'],
-            "high": sim['total_95pct'],
-            "reason": reason,
-            "signal_score": signal_score,
-            "odds_source": odds_source,
-        })
+            # --- Recommendation reason (based on abs_edge) ---
+            if abs_edge >= 8:
+                reason = "模型预测与盘口差距较大"
+            elif abs_edge >= 6:
+                reason = "模型预测存在明显价值"
+            else:
+                reason = "信号较弱，不推荐"
+
+            # --- Step 6: Save prediction to database ---
+            spread_prob = combined_spread_prob
+            total_prob = combined_total_prob
+            overall_confidence = max(abs(spread_edge), abs(total_edge))
+            overall_stars = max(spread_stars, total_stars)
+            recommendation_idx = max(spread_rating["spread_recommendation_index"],
+                                     total_rating["total_recommendation_index"])
+
+            prediction_row = {
+                "game_id": game_id,
+                "home_team": home.get("full_name", ""),
+                "away_team": vis.get("full_name", ""),
+                "prediction_time": datetime.utcnow().isoformat(),
+                "spread_pick": spread_pick,
+                "spread_prob": spread_prob,
+                "total_pick": total_pick,
+                "total_prob": total_prob,
+                "confidence_score": round(overall_confidence, 4),
+                "star_rating": overall_stars,
+                "recommendation_index": recommendation_idx,
+                "expected_home_score": sim["expected_home_score"],
+                "expected_visitor_score": sim["expected_visitor_score"],
+                "simulation_variance": sim["score_distribution_variance"],
+                "opening_spread": opening_spread,
+                "live_spread": live_spread,
+                "opening_total": opening_total,
+                "live_total": live_total,
+                "simulation_runs": sim_count,
+                "odds_source": odds_source,
+                "model_version": model_bundle.version,
+                "feature_count": feature_count,
+                "spread_edge": round(spread_edge, 4),
+                "total_edge": round(total_edge, 4),
+                "edge_score": edge_score,
+                "clv_projection": clv_projection,
+                "home_win_probability": sim.get("home_win_probability", 0.0),
+                "details": {"simulation": sim, "market": market,
+                            "spread_rating": spread_rating, "total_rating": total_rating},
+            }
+
+            insert_prediction(snapshot_date=target_date, row=prediction_row)
+            saved_count += 1
+
+            # --- Supabase persistence (mandatory when configured) ---
+            from .supabase_client import save_prediction, save_simulation_log
+            save_prediction({
+                **prediction_row,
+                "game_date": target_date,
+                "spread_line": live_spread,
+                "total_line": live_total,
+                "spread_confidence": spread_confidence,
+                "total_confidence": total_confidence,
+            })
+            save_simulation_log({
+                "game_id": game_id,
+                "model_version": model_bundle.version,
+                "simulation_runs": sim_count,
+                **sim,
+            })
+
+            # --- Collect game result for core pick selection ---
+            total_range = f"{int(sim['total_5pct'])} – {int(sim['total_95pct'])}"
+            under_probability = 1.0 - over_probability
+
+            game_results.append({
+                "idx": len(game_results),
+                "game_id": game_id,
+                "home": home,
+                "vis": vis,
+                "live_total": live_total,
+                "predicted_total": predicted_total,
+                "total_edge_pts": total_edge_pts,
+                "over_probability": over_probability,
+                "under_probability": under_probability,
+                "total_range": total_range,
+                "low": sim['total_5pct'],
+                "high": sim['total_95pct'],
+                "reason": reason,
+                "signal_score": signal_score,
+                "odds_source": odds_source,
+            })
 
     # --- Daily recommendation ---
     # Quality filter: abs(edge) >= 5 AND prob >= 0.60 → recommended.
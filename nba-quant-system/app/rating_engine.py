@@ -1,5 +1,11 @@
 from __future__ import annotations
 
+import math
+from bisect import bisect_right
+
+# Lower bound of each star band, ascending: index + 1 == stars awarded.
+_STAR_THRESHOLDS = (5.0, 7.0, 9.0, 12.0, 15.0)
+
 
 def _edge_to_stars(edge_pct: float) -> int:
     """Map edge percentage to star rating.
@@ -11,17 +17,9 @@ def _edge_to_stars(edge_pct: float) -> int:
     ★      Edge ≥ 5
     """
     edge = abs(edge_pct)
-    if edge >= 15.0:
-        return 5
-    if edge >= 12.0:
-        return 4
-    if edge >= 9.0:
-        return 3
-    if edge >= 7.0:
-        return 2
-    if edge >= 5.0:
-        return 1
-    return 0
+    if math.isnan(edge):
+        return 0
+    return bisect_right(_STAR_THRESHOLDS, edge)
 
 
 def compute_edge_score(model_prob: float, implied_prob: float = 0.5) -> float:
@@ -63,10 +61,15 @@ def compute_kelly_stake(probability: float, odds: float = 1.91,
     }
 
 
+_STARS = ("☆", "★", "★★", "★★★", "★★★★", "★★★★★")
+
+
 def stars_display(star_count: int) -> str:
     """Return star string for display, e.g. ★★★."""
     if star_count <= 0:
         return "☆"
+    if star_count < len(_STARS):
+        return _STARS[star_count]
     return "★" * star_count
 
 
@@ -3,7 +3,11 @@ from __future__ import annotations
 import json
 import logging
 import os
+import threading
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
 
 import requests
 
@@ -15,6 +19,18 @@ logger = logging.getLogger(__name__)
 BALLDONTLIE = "https://api.balldontlie.io/v1"
 API_KEY = os.getenv("BALLDONTLIE_API_KEY", "")
 
+# One session per thread: fetch_game_results fans out across a pool, and
+# requests.Session is not thread-safe, but each worker still reuses its own
+# TLS connection across the games it fetches.
+_thread_local = threading.local()
+
+
+def _get_session() -> requests.Session:
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    return session
+
 TEAM_CN = {
     "Atlanta Hawks": "亚特兰大老鹰",
     "Boston Celtics": "波士顿凯尔特人",
@@ -54,19 +70,24 @@ def cn(team):
     return TEAM_CN.get(team, team)
 
 
+# Direction of each pick: a pick hits when sign * (result - line) > 0.
+# Unknown picks map to 0 and return False before the line is touched (it may
+# be None for such rows); exact pushes never hit.
+_SIDE_SIGN = {"home": 1, "away": -1}
+_TOTAL_SIGN = {"over": 1, "under": -1}
+
+
 def spread_hit(row: dict) -> bool:
     """Determine if a spread pick was correct.
 
     Uses ``final_home_score``, ``final_visitor_score``, ``spread``, and
     ``spread_pick`` fields from *row*.
     """
+    sign = _SIDE_SIGN.get(row["spread_pick"], 0)
+    if not sign:
+        return False
     actual_margin = row["final_home_score"] - row["final_visitor_score"]
-    spread = row["spread"]
-    if row["spread_pick"] == "home":
-        return actual_margin > spread
-    if row["spread_pick"] == "away":
-        return actual_margin < spread
-    return False
+    return sign * (actual_margin - row["spread"]) > 0
 
 
 def total_hit(pred_pick, home_score, away_score, total_line):
@@ -83,12 +104,8 @@ def total_hit(pred_pick, home_score, away_score, total_line):
     total_line : int | float
         The over/under line.
     """
-    total = home_score + away_score
-    if pred_pick == "over":
-        return total > total_line
-    if pred_pick == "under":
-        return total < total_line
-    return False
+    sign = _TOTAL_SIGN.get(pred_pick, 0)
+    return bool(sign) and sign * (home_score + away_score - total_line) > 0
 
 
 def calc_spread_hit(pred_pick, home_team, visitor_team,
@@ -100,14 +117,11 @@ def calc_spread_hit(pred_pick, home_team, visitor_team,
     If picking home: hit when adjusted_margin > 0
     If picking away: hit when adjusted_margin < 0
     """
-    actual_margin = final_home - final_visitor
-    adjusted_margin = actual_margin + spread_line
-
-    if pred_pick == "home":
-        return adjusted_margin > 0
-    if pred_pick == "away":
-        return adjusted_margin < 0
-    return False
+    sign = _SIDE_SIGN.get(pred_pick, 0)
+    if not sign:
+        return False
+    adjusted_margin = (final_home - final_visitor) + spread_line
+    return sign * adjusted_margin > 0
 
 
 def calc_total_hit(total_pick, final_home, final_visitor, total_line):
@@ -116,13 +130,8 @@ def calc_total_hit(total_pick, final_home, final_visitor, total_line):
     Over: actual total > line
     Under: actual total < line
     """
-    final_total = final_home + final_visitor
-
-    if total_pick == "over":
-        return final_total > total_line
-    if total_pick == "under":
-        return final_total < total_line
-    return False
+    sign = _TOTAL_SIGN.get(total_pick, 0)
+    return bool(sign) and sign * (final_home + final_visitor - total_line) > 0
 
 
 def zh_hit(flag):
@@ -220,6 +229,11 @@ def calculate_rates(rows: list[dict]) -> tuple[float, float]:
     return total_rate, overall_rate
 
 
+# Shared read-only default for missing payload levels, so lookups on
+# sparse rows don't allocate a fresh dict per level.
+_EMPTY: Mapping = MappingProxyType({})
+
+
 def parse_prediction(row: dict) -> dict:
     """Extract prediction fields from a Supabase predictions row.
 
@@ -227,10 +241,10 @@ def parse_prediction(row: dict) -> dict:
     normalises the nested structure into a flat dict suitable for the
     review pipeline.
     """
-    payload = row.get("payload", {})
-    details = payload.get("details", {})
-    sim = details.get("simulation", {})
-    total_rating = details.get("total_rating", {})
+    payload = row.get("payload", _EMPTY)
+    details = payload.get("details", _EMPTY)
+    sim = details.get("simulation", _EMPTY)
+    total_rating = details.get("total_rating", _EMPTY)
 
     predicted_margin = sim.get("predicted_margin")
     predicted_total = sim.get("predicted_total")
@@ -259,9 +273,9 @@ def extract_prediction_fields(p: dict) -> tuple[str, str]:
     Returns ``(spread_pick, total_pick)`` derived from the nested
     ``payload.details.simulation`` structure.
     """
-    payload = p.get("payload", {})
-    details = payload.get("details", {})
-    sim = details.get("simulation", {})
+    payload = p.get("payload", _EMPTY)
+    details = payload.get("details", _EMPTY)
+    sim = details.get("simulation", _EMPTY)
 
     predicted_margin = sim.get("predicted_margin")
     predicted_total = sim.get("predicted_total")
@@ -273,15 +287,16 @@ def extract_prediction_fields(p: dict) -> tuple[str, str]:
 
 
 def _deduplicate_predictions(predictions: list[dict]) -> list[dict]:
-    """Keep only the latest prediction per game_id based on created_at."""
+    """Keep only the latest prediction per game_id based on created_at.
+
+    Single pass; on equal timestamps the first row seen is kept.
+    """
     latest: dict = {}
     for row in predictions:
         gid = row.get("game_id")
-        if gid not in latest:
+        current = latest.get(gid)
+        if current is None or row.get("created_at", "") > current.get("created_at", ""):
             latest[gid] = row
-        else:
-            if row.get("created_at", "") > latest[gid].get("created_at", ""):
-                latest[gid] = row
     return list(latest.values())
 
 
@@ -317,7 +332,7 @@ def fetch_game_result(game_id):
     }
 
     try:
-        r = requests.get(url, headers=headers, timeout=20)
+        r = _get_session().get(url, headers=headers, timeout=20)
 
         if r.status_code != 200:
             print("BALLDONTLIE BAD RESPONSE:", r.text)
@@ -346,16 +361,36 @@ def fetch_game_result(game_id):
         return None
 
 
-def run_review() -> None:
+_FETCH_WORKERS = 8
+
+
+def fetch_game_results(game_ids: list) -> dict:
+    """Fetch final scores for several games concurrently.
+
+    Returns a mapping of game_id to the :func:`fetch_game_result` value
+    (``None`` for games that are unfinished or failed to load).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    ids = list(dict.fromkeys(game_ids))
+    if not ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(_FETCH_WORKERS, len(ids))) as pool:
+        return dict(zip(ids, pool.map(fetch_game_result, ids)))
+
+
+def run_review(output_dir: str | Path = ".") -> None:
+    """Review finished games and write ``review_latest.json`` to *output_dir*."""
     from .supabase_client import save_review_result, fetch_recent_review_results
 
     predictions = load_latest_predictions()
+    results = fetch_game_results([p["game_id"] for p in predictions])
 
     for p in predictions:
         game_id = p["game_id"]
         pred = parse_prediction(p)
 
-        result = fetch_game_result(game_id)
+        result = results.get(game_id)
         print("GAME RESULT:", game_id, result)
 
         if not result:
@@ -404,7 +439,7 @@ def run_review() -> None:
         "ou_hit_rate": total_rate
     }
 
-    with open("review_latest.json", "w") as f:
+    with open(Path(output_dir) / "review_latest.json", "w") as f:
         json.dump(report, f, indent=2)
 
     from .supabase_client import _get_client
@@ -6,53 +6,148 @@ If credentials are not set, calls are silently skipped.
 """
 from __future__ import annotations
 
+import atexit
 import logging
 import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 logger = logging.getLogger(__name__)
 
 _client: Any = None
 _available: bool | None = None
+_init_lock = threading.Lock()
+
+_TABLES = ("predictions", "simulation_logs", "training_logs", "review_results")
+# PostgREST's default max-rows; larger reads are paginated with range().
+_PAGE_SIZE = 1000
+
+# HTTP pool tuning: retry failed connects and keep idle connections open
+# across the gaps between pipeline stages.
+_CONNECT_RETRIES = 2
+_KEEPALIVE_EXPIRY = 60.0
+
+# Retry policy for inserts.  Only failures where the row cannot have been
+# written are retried, so a retry never duplicates a committed insert:
+# PostgREST's own "could not reach the database / pool" errors (JSON body
+# with a PGRST00x code) and gateway statuses from non-JSON bodies, which
+# postgrest reports as the bare HTTP status.
+_RETRY_ATTEMPTS = 3
+_RETRY_BASE_DELAY = 0.2
+_RETRY_PGRST_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+_RETRY_HTTP_STATUS = {"429", "502", "503"}
+
+# Insert buffering used inside batched_writes().
+_MAX_BATCH = 500
+# Seconds a buffered row may wait before the next append flushes it.  A
+# prediction run spends a second or more per game, so this has to span many
+# games for the batch to hold more than a row or two.
+_MAX_BATCH_AGE = 30.0
+# The batching flag is per thread, so saves from worker threads outside the
+# block write immediately; the buffers themselves are guarded by a lock.
+_batch_state = threading.local()
+_buffer_lock = threading.Lock()
+_buffers: dict[str, list[dict[str, Any]]] = defaultdict(list)
+_buffered_since: dict[str, float] = {}
 
 
 def _get_client() -> Any:
+    """Return the shared Supabase client, or None when not configured.
+
+    Every save/fetch helper calls this first, so the common case — client
+    already initialised or already known to be unavailable — is a single
+    global read and comparison.  Initialisation is left to
+    :func:`_init_client`.
+    """
+    client = _client
+    if client is not None or _available is False:
+        return client
+    return _init_client()
+
+
+def _init_client() -> Any:
+    """Create the Supabase client from the environment (cold path).
+
+    Guarded by a lock so that concurrent first calls (e.g. from the
+    upload/download thread pools) create a single client.
+    """
     global _client, _available
-    if _available is False:
-        return None
-    if _client is not None:
+    with _init_lock:
+        if _client is not None or _available is False:
+            return _client
+        url = os.getenv("SUPABASE_URL", "")
+        key = os.getenv("SUPABASE_KEY", "")
+        if not url or not key:
+            logger.debug("Supabase credentials not configured — skipping")
+            _available = False
+            return None
+        from supabase import ClientOptions, create_client  # type: ignore
+        _client = create_client(
+            url, key, options=ClientOptions(httpx_client=_build_http_client())
+        )
+        _available = True
+        logger.info("Supabase client initialized")
+        _ensure_tables()
         return _client
-    url = os.getenv("SUPABASE_URL", "")
-    key = os.getenv("SUPABASE_KEY", "")
-    if not url or not key:
-        logger.debug("Supabase credentials not configured — skipping")
-        _available = False
-        return None
-    from supabase import create_client  # type: ignore
-    _client = create_client(url, key)
-    _available = True
-    logger.info("Supabase client initialized")
-    _ensure_tables()
-    return _client
+
+
+def _build_http_client() -> Any:
+    """Create the long-lived HTTP client shared by PostgREST and Storage.
+
+    Connections are kept alive between calls so consecutive writes reuse
+    the same TCP/TLS session instead of paying a handshake each time;
+    failed connection attempts are retried by the transport itself.
+    HTTP/2 is enabled when the optional ``h2`` package is installed.
+    """
+    import httpx
+
+    try:
+        import h2  # type: ignore  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    transport = httpx.HTTPTransport(
+        http2=http2,
+        retries=_CONNECT_RETRIES,
+        limits=httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=40,
+            keepalive_expiry=_KEEPALIVE_EXPIRY,
+        ),
+    )
+    session = httpx.Client(transport=transport, timeout=30)
+    atexit.register(session.close)
+    return session
 
 
 def _ensure_tables() -> None:
-    """Verify that required tables exist by attempting a select.
+    """Verify that required tables exist with a body-less HEAD select.
 
     Tables must be created in Supabase dashboard or via migration.
-    This only logs whether they are accessible.
+    This only logs whether they are accessible.  The probes run in
+    parallel so start-up pays one round-trip rather than one per table.
     """
+    from concurrent.futures import ThreadPoolExecutor
+
     client = _client
     if client is None:
         return
-    for table in ("predictions", "simulation_logs", "training_logs", "review_results"):
+
+    def _probe(table: str) -> None:
         try:
-            client.table(table).select("*").limit(1).execute()
+            client.table(table).select("*", head=True).limit(0).execute()
             logger.info("Supabase table '%s' accessible", table)
         except Exception:
             logger.warning("Supabase table '%s' not accessible — create it in Supabase dashboard", table)
 
+    with ThreadPoolExecutor(max_workers=len(_TABLES)) as pool:
+        list(pool.map(_probe, _TABLES))
+
 
 def adaptive_upsert(
     table: str,
@@ -69,39 +164,141 @@ def adaptive_upsert(
         return
 
     try:
-        client.table(table).upsert(record, on_conflict=conflict).execute()
+        client.table(table).upsert(
+            record, on_conflict=conflict, returning="minimal"
+        ).execute()
         logger.info("Upserted record to '%s': %s", table, record.get("game_id"))
     except Exception as exc:
         logger.warning("UPSERT FAILED for '%s': %s", table, exc)
         # Retry once after a short delay
-        import time
         time.sleep(0.5)
         try:
-            client.table(table).upsert(record, on_conflict=conflict).execute()
+            client.table(table).upsert(
+                record, on_conflict=conflict, returning="minimal"
+            ).execute()
             logger.info("Upserted after retry to '%s': %s", table, record.get("game_id"))
         except Exception as exc2:
             logger.error("FINAL UPSERT FAILED for '%s': %s", table, exc2)
 
 
+def _is_transient(exc: Exception) -> bool:
+    """True when *exc* means the insert never reached the database.
+
+    Connect-phase transport errors and pool timeouts happen before the
+    request is sent.  Read timeouts and 500/504 responses are not retried,
+    as the first attempt may already have committed.
+    """
+    import httpx
+
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    code = str(getattr(exc, "code", ""))
+    return code in _RETRY_PGRST_CODES or code in _RETRY_HTTP_STATUS
+
+
+def _execute(query: Any) -> Any:
+    """Run an insert ``query.execute()``, retrying transient failures with backoff.
+
+    Other errors, and the last failed attempt, are raised to the caller.
+    """
+    for attempt in range(_RETRY_ATTEMPTS):
+        try:
+            return query.execute()
+        except Exception as exc:
+            if attempt == _RETRY_ATTEMPTS - 1 or not _is_transient(exc):
+                raise
+            delay = _RETRY_BASE_DELAY * 2 ** attempt + random.uniform(0, 0.05)
+            logger.warning("Supabase: transient error (%s) — retrying in %.2fs", exc, delay)
+            time.sleep(delay)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@contextmanager
+def batched_writes() -> Iterator[None]:
+    """Buffer inserts from the ``save_*`` log helpers and write them in bulk.
+
+    Inside the block, rows from ``save_prediction``, ``save_simulation_log``
+    and ``save_training_log`` are queued per table and sent as one multi-row
+    INSERT on exit, whenever a table reaches ``_MAX_BATCH`` rows, or when
+    a row is appended after the oldest queued row is ``_MAX_BATCH_AGE``
+    seconds old.  A run over N games therefore costs about one insert per
+    table per half minute instead of 2N, while a long block still lands
+    its rows in the database as it goes.  Outside the block the helpers
+    keep writing immediately.
+
+    Batching applies only to the thread that opened the block; saves made
+    from other threads (thread pools, timers) are written immediately.
+    """
+    previous = _is_batching()
+    _batch_state.active = True
+    try:
+        yield
+    finally:
+        _batch_state.active = previous
+        if not previous:
+            flush_all()
+
+
+def _is_batching() -> bool:
+    return getattr(_batch_state, "active", False)
+
+
+def flush_all() -> None:
+    """Write out every buffered insert.  Failures are logged, not raised."""
+    with _buffer_lock:
+        tables = list(_buffers)
+    for table in tables:
+        _flush_table(table)
+
+
+def _enqueue(table: str, entry: dict[str, Any]) -> None:
+    now = time.monotonic()
+    with _buffer_lock:
+        buffer = _buffers[table]
+        buffer.append(entry)
+        started = _buffered_since.setdefault(table, now)
+        due = len(buffer) >= _MAX_BATCH or now - started >= _MAX_BATCH_AGE
+    if due:
+        _flush_table(table)
+
+
+def _flush_table(table: str) -> None:
+    with _buffer_lock:
+        rows = _buffers.pop(table, None)
+        _buffered_since.pop(table, None)
+    client = _get_client()
+    if not rows or client is None:
+        return
+    try:
+        _execute(client.table(table).insert(rows, returning="minimal"))
+        logger.info("Supabase: wrote %d buffered rows to '%s'", len(rows), table)
+    except Exception:
+        logger.exception("Supabase: failed to write %d buffered rows to '%s' — continuing", len(rows), table)
+
+
 def save_prediction(row: dict[str, Any]) -> None:
     """Persist a prediction row to Supabase.
 
     All prediction data is stored inside a single ``payload`` JSONB column.
     The ``is_final_prediction`` flag is set to ``True`` in the payload so
     consumers can identify the latest prediction per game.
+    Each call is a single INSERT: earlier rows for the same game are kept
+    and readers keep the newest one (see ``_deduplicate_predictions``).
     Errors are caught so the prediction pipeline never crashes if logging fails.
     """
     client = _get_client()
     if client is None:
         return
-    record = dict(row)
-    record.setdefault("created_at", datetime.now(timezone.utc).isoformat())
-    record["is_final_prediction"] = True
+    record = {"created_at": _now_iso(), **row, "is_final_prediction": True}
+    entry = {"game_id": record["game_id"], "payload": record}
+    if _is_batching():
+        _enqueue("predictions", entry)
+        return
     try:
-        client.table("predictions").insert({
-            "game_id": record["game_id"],
-            "payload": record,
-        }).execute()
+        _execute(client.table("predictions").insert(entry, returning="minimal"))
         logger.info("Supabase: prediction saved for game %s", row.get("game_id"))
     except Exception:
         logger.exception("Supabase: failed to save prediction — continuing")
@@ -116,13 +313,13 @@ def save_simulation_log(row: dict[str, Any]) -> None:
     client = _get_client()
     if client is None:
         return
-    record = dict(row)
-    record.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
+    record = {"timestamp": _now_iso(), **row}
+    entry = {"game_id": record["game_id"], "payload": record}
+    if _is_batching():
+        _enqueue("simulation_logs", entry)
+        return
     try:
-        client.table("simulation_logs").insert({
-            "game_id": record["game_id"],
-            "payload": record,
-        }).execute()
+        _execute(client.table("simulation_logs").insert(entry, returning="minimal"))
         logger.info("Supabase: simulation log saved for game %s", row.get("game_id"))
     except Exception:
         logger.exception("Supabase: failed to save simulation log — continuing")
@@ -137,23 +334,46 @@ def save_training_log(row: dict[str, Any]) -> None:
     client = _get_client()
     if client is None:
         return
-    record = dict(row)
-    record.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
+    record = {"timestamp": _now_iso(), **row}
+    entry = {"payload": record}
+    if _is_batching():
+        _enqueue("training_logs", entry)
+        return
     try:
-        client.table("training_logs").insert({"payload": record}).execute()
+        _execute(client.table("training_logs").insert(entry, returning="minimal"))
         logger.info("Supabase: training log saved for version %s", row.get("model_version"))
     except Exception:
         logger.exception("Supabase: failed to save training log — continuing")
 
 
+def save_predictions(rows: Iterable[dict[str, Any]]) -> None:
+    """Persist many predictions with multi-row INSERTs of up to ``_MAX_BATCH``."""
+    with batched_writes():
+        for row in rows:
+            save_prediction(row)
+
+
+def save_simulation_logs(rows: Iterable[dict[str, Any]]) -> None:
+    """Persist many simulation logs with multi-row INSERTs of up to ``_MAX_BATCH``."""
+    with batched_writes():
+        for row in rows:
+            save_simulation_log(row)
+
+
+def save_training_logs(rows: Iterable[dict[str, Any]]) -> None:
+    """Persist many training logs with multi-row INSERTs of up to ``_MAX_BATCH``."""
+    with batched_writes():
+        for row in rows:
+            save_training_log(row)
+
+
 def save_review_result(row: dict[str, Any]) -> None:
     """Persist a review result to Supabase via UPSERT on game_id.
 
     Each game_id appears only once in the ``review_results`` table.  If a
     result already exists for the game, it is updated instead of duplicated.
     """
-    record = dict(row)
-    record.setdefault("reviewed_at", datetime.now(timezone.utc).isoformat())
+    record = {"reviewed_at": _now_iso(), **row}
 
     try:
         adaptive_upsert("review_results", record)
@@ -206,19 +426,23 @@ def fetch_latest_training_metrics() -> dict[str, Any] | None:
 def fetch_predictions_for_date(game_date: str) -> list[dict[str, Any]]:
     """Fetch predictions for a given date from Supabase.
 
+    The date and ``is_final_prediction`` filters are evaluated by PostgREST
+    on the JSONB payload, so only the matching rows are transferred.
+
     Returns a list of prediction payload dicts or an empty list.
     """
     client = _get_client()
     if client is None:
         return []
     try:
-        resp = client.table("predictions").select("payload").execute()
-        results = []
-        for row in resp.data or []:
-            payload = row.get("payload") or {}
-            if payload.get("game_date") == game_date and payload.get("is_final_prediction"):
-                results.append(payload)
-        return results
+        resp = (
+            client.table("predictions")
+            .select("payload")
+            .eq("payload->>game_date", game_date)
+            .eq("payload->>is_final_prediction", "true")
+            .execute()
+        )
+        return [row["payload"] for row in resp.data or [] if row.get("payload")]
     except Exception:
         logger.debug("Supabase: could not fetch predictions for %s", game_date)
     return []
@@ -231,18 +455,43 @@ def fetch_all_predictions() -> list[dict[str, Any]]:
     (``_deduplicate_predictions``) retains only the latest prediction per
     ``game_id``.
 
+    Rows are read in pages of ``_PAGE_SIZE`` via range requests so that
+    histories longer than the PostgREST row cap are not silently truncated.
+    ``id`` breaks ``created_at`` ties so page boundaries are stable.  If a
+    later page fails, the rows already read are returned and a warning is
+    logged.
+
     Returns a list of raw rows (each containing ``id``, ``game_id``,
     ``payload``, and optionally ``game_date``).
     """
     client = _get_client()
     if client is None:
         return []
+    rows: list[dict[str, Any]] = []
     try:
-        resp = client.table("predictions").select("*").order("created_at", desc=True).execute()
-        return resp.data or []
+        while True:
+            start = len(rows)
+            resp = (
+                client.table("predictions")
+                .select("*")
+                .order("created_at", desc=True)
+                .order("id", desc=True)
+                .range(start, start + _PAGE_SIZE - 1)
+                .execute()
+            )
+            page = resp.data or []
+            rows.extend(page)
+            if len(page) < _PAGE_SIZE:
+                return rows
     except Exception:
-        logger.debug("Supabase: could not fetch all predictions")
-    return []
+        if not rows:
+            logger.debug("Supabase: could not fetch all predictions")
+            return []
+        logger.warning(
+            "Supabase: prediction fetch failed after %d rows; returning partial history",
+            len(rows),
+        )
+    return rows
 
 
 def update_prediction_game_date(record_id: int, game_date: str) -> None:
@@ -251,7 +500,7 @@ def update_prediction_game_date(record_id: int, game_date: str) -> None:
     if client is None:
         return
     client.table("predictions").update(
-        {"game_date": game_date}
+        {"game_date": game_date}, returning="minimal"
     ).eq("id", record_id).execute()
     logger.info("Supabase: updated game_date=%s for prediction id=%s", game_date, record_id)
 
@@ -268,13 +517,34 @@ _MODEL_STORAGE_FILES = (
     "total_model.pkl",
     "model_version.json",
 )
+_CONTENT_TYPES = {".gz": "application/gzip", ".json": "application/json"}
+
+
+def _storage_name(filename: str) -> str:
+    """Object name in the bucket; pickles are stored gzip-compressed."""
+    return f"{filename}.gz" if filename.endswith(".pkl") else filename
+
+
+def _is_not_found(exc: Exception) -> bool:
+    """True when a Storage error says the object does not exist."""
+    status = str(getattr(exc, "status", ""))
+    code = str(getattr(exc, "code", "")).lower()
+    message = str(getattr(exc, "message", "")).lower()
+    return status == "404" or code == "not_found" or message == "object not found"
 
 
 def upload_models_to_storage(model_dir: str | os.PathLike) -> bool:
     """Upload trained model files to Supabase Storage bucket.
 
+    Pickles are gzip-compressed to a temporary file and every file is
+    streamed from disk; uploads run concurrently and overwrite existing
+    objects in place (``upsert``).
     Returns True if all files were uploaded successfully, False otherwise.
     """
+    import gzip
+    import shutil
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
     from pathlib import Path
 
     client = _get_client()
@@ -282,32 +552,49 @@ def upload_models_to_storage(model_dir: str | os.PathLike) -> bool:
         logger.debug("Supabase not configured — model upload skipped")
         return False
     model_path = Path(model_dir)
-    success = True
-    for filename in _MODEL_STORAGE_FILES:
+    bucket = client.storage.from_(_STORAGE_BUCKET)
+
+    def _upload_one(filename: str) -> bool:
         filepath = model_path / filename
         if not filepath.exists():
             logger.warning("Model file %s not found — skipping upload", filename)
-            continue
+            return True
+        name = _storage_name(filename)
         try:
-            data = filepath.read_bytes()
-            # Remove existing file first (upsert)
-            try:
-                client.storage.from_(_STORAGE_BUCKET).remove([filename])
-            except Exception:
-                logger.debug("Supabase Storage: could not remove existing %s", filename)
-            client.storage.from_(_STORAGE_BUCKET).upload(filename, data)
-            logger.info("Supabase Storage: uploaded %s", filename)
+            with tempfile.TemporaryDirectory() as tmp:
+                source = filepath
+                if name != filename:
+                    source = Path(tmp) / name
+                    with filepath.open("rb") as src, gzip.open(source, "wb", compresslevel=6) as dst:
+                        shutil.copyfileobj(src, dst)
+                content_type = _CONTENT_TYPES.get(source.suffix, "application/octet-stream")
+                with source.open("rb") as fh:
+                    bucket.upload(name, fh, {"upsert": "true", "content-type": content_type})
+            logger.info("Supabase Storage: uploaded %s", name)
+            return True
         except Exception:
             logger.exception("Supabase Storage: failed to upload %s", filename)
-            success = False
-    return success
+            return False
+
+    with ThreadPoolExecutor(max_workers=len(_MODEL_STORAGE_FILES)) as pool:
+        results = list(pool.map(_upload_one, _MODEL_STORAGE_FILES))
+    return all(results)
 
 
 def download_models_from_storage(model_dir: str | os.PathLike) -> bool:
     """Download model files from Supabase Storage bucket.
 
+    Files are fetched concurrently.  Compressed pickles are decompressed
+    to disk in chunks through a temporary ``.part`` file, so a failed
+    transfer never leaves a truncated model behind.  When the compressed
+    object does not exist, the uncompressed one uploaded by older versions
+    is used instead; any other error fails that file.
     Returns True if all required model files were downloaded, False otherwise.
     """
+    import gzip
+    import io
+    import shutil
+    from concurrent.futures import ThreadPoolExecutor
     from pathlib import Path
 
     client = _get_client()
@@ -316,15 +603,39 @@ def download_models_from_storage(model_dir: str | os.PathLike) -> bool:
         return False
     model_path = Path(model_dir)
     model_path.mkdir(parents=True, exist_ok=True)
-    downloaded = 0
-    for filename in _MODEL_STORAGE_FILES:
+    bucket = client.storage.from_(_STORAGE_BUCKET)
+
+    def _restore(filename: str, part: Path) -> None:
+        name = _storage_name(filename)
+        if name != filename:
+            try:
+                blob = bucket.download(name)
+            except Exception as exc:
+                if not _is_not_found(exc):
+                    raise
+                logger.debug("Supabase Storage: %s not found, trying %s", name, filename)
+            else:
+                with gzip.GzipFile(fileobj=io.BytesIO(blob)) as src, part.open("wb") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                return
+        part.write_bytes(bucket.download(filename))
+
+    def _download_one(filename: str) -> bool:
+        target = model_path / filename
+        part = target.with_name(f"{filename}.part")
         try:
-            data = client.storage.from_(_STORAGE_BUCKET).download(filename)
-            (model_path / filename).write_bytes(data)
+            _restore(filename, part)
+            part.replace(target)
             logger.info("Supabase Storage: downloaded %s", filename)
-            downloaded += 1
+            return True
         except Exception:
             logger.warning("Supabase Storage: %s not available", filename)
+            return False
+        finally:
+            part.unlink(missing_ok=True)
+
+    with ThreadPoolExecutor(max_workers=len(_MODEL_STORAGE_FILES)) as pool:
+        downloaded = sum(pool.map(_download_one, _MODEL_STORAGE_FILES))
     # At minimum the two score models must be present
     required = ("home_model.pkl", "away_model.pkl")
     ok = all((model_path / f).exists() for f in required)
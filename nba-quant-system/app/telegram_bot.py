@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import atexit
 import logging
 import os
+import threading
 from typing import Optional
 
 import requests
@@ -10,6 +12,9 @@ from .telegram_text import TEXT
 
 logger = logging.getLogger(__name__)
 
+# Shared session so repeated Telegram/GitHub calls reuse the TLS connection.
+_session = requests.Session()
+
 
 def _bot_url(method: str) -> str:
     token = os.getenv("TELEGRAM_BOT_TOKEN", "")
@@ -31,7 +36,7 @@ def send_message(text: str, reply_markup: dict | None = None) -> Optional[int]:
     if reply_markup is None:
         reply_markup = control_panel_markup()
     payload["reply_markup"] = reply_markup
-    resp = requests.post(_bot_url("sendMessage"), json=payload, timeout=20)
+    resp = _session.post(_bot_url("sendMessage"), json=payload, timeout=20)
     resp.raise_for_status()
     data = resp.json()
     return data.get("result", {}).get("message_id")
@@ -49,7 +54,7 @@ def edit_message(message_id: int, text: str) -> None:
         "parse_mode": "HTML",
     }
     try:
-        resp = requests.post(_bot_url("editMessageText"), json=payload, timeout=20)
+        resp = _session.post(_bot_url("editMessageText"), json=payload, timeout=20)
         resp.raise_for_status()
     except Exception:
         logger.debug("edit_message failed for message_id=%s", message_id, exc_info=True)
@@ -73,7 +78,7 @@ def dispatch_workflow(workflow_file: str, ref: str = "main") -> None:
         raise ValueError("GITHUB_TOKEN and GITHUB_REPOSITORY required for workflow dispatch")
     url = f"https://api.github.com/repos/{repo}/actions/workflows/{workflow_file}/dispatches"
     headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
-    requests.post(url, headers=headers, json={"ref": ref}, timeout=20).raise_for_status()
+    _session.post(url, headers=headers, json={"ref": ref}, timeout=20).raise_for_status()
 
 
 class ProgressTracker:
@@ -88,14 +93,27 @@ class ProgressTracker:
         ("✅", TEXT["done"]),
     ]
 
+    # Rendered stage lines, indexed like STAGES.
+    _DONE = tuple(f"✅ {label}" for _, label in STAGES)
+    _CURRENT = tuple(f"{icon} {label} ..." for icon, label in STAGES)
+    _PENDING = tuple(f"⬜ {label}" for _, label in STAGES)
+
     # Stage indices to show when models are already loaded from Supabase.
     _SUPABASE_STAGES = {2, 3, 5}  # load_model, simulation, done
 
+    # Updates within this window are coalesced into a single edit, which
+    # keeps a many-game slate under Telegram's edit rate limit.
+    EDIT_INTERVAL = 0.5
+
     def __init__(self) -> None:
         self.message_id: Optional[int] = None
         self.current_stage = -1
         self.game_progress: list[str] = []
         self.model_source: str | None = None
+        self._last_text = ""
+        self._pending: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
+        self._send_lock = threading.Lock()
 
     def _visible_stages(self) -> list[tuple[int, str, str]]:
         """Return (index, icon, label) tuples for stages that should be displayed."""
@@ -107,14 +125,15 @@ class ProgressTracker:
         return stages
 
     def _build_text(self) -> str:
+        current = self.current_stage
         lines = ["<b>🏀 NBA 量化预测系统</b>", ""]
-        for i, icon, label in self._visible_stages():
-            if i < self.current_stage:
-                lines.append(f"✅ {label}")
-            elif i == self.current_stage:
-                lines.append(f"{icon} {label} ...")
+        for i, _, _ in self._visible_stages():
+            if i < current:
+                lines.append(self._DONE[i])
+            elif i == current:
+                lines.append(self._CURRENT[i])
             else:
-                lines.append(f"⬜ {label}")
+                lines.append(self._PENDING[i])
         if self.game_progress:
             lines.append("")
             lines.extend(self.game_progress)
@@ -122,8 +141,10 @@ class ProgressTracker:
 
     def start(self) -> None:
         self.current_stage = 0
+        text = self._build_text()
         try:
-            self.message_id = send_message(self._build_text(), reply_markup={})
+            self.message_id = send_message(text, reply_markup={})
+            self._last_text = text
         except Exception:
             logger.debug("ProgressTracker.start: send failed", exc_info=True)
 
@@ -137,12 +158,42 @@ class ProgressTracker:
 
     def finish(self) -> None:
         self.current_stage = len(self.STAGES) - 1
-        self._update()
+        self._flush_edit()
 
     def _update(self) -> None:
+        """Schedule an edit unless one is already pending.
+
+        The pending edit renders the latest state when it fires, so
+        updates arriving in the meantime are folded into it.  It is also
+        registered with :mod:`atexit`, so an early ``sys.exit`` that skips
+        :meth:`finish` still sends the last state instead of dropping it
+        with the daemon timer.
+        """
         if self.message_id is None:
             return
-        try:
-            edit_message(self.message_id, self._build_text())
-        except Exception:
-            logger.debug("ProgressTracker._update: edit failed", exc_info=True)
+        with self._timer_lock:
+            if self._pending is not None:
+                return
+            self._pending = threading.Timer(self.EDIT_INTERVAL, self._flush_edit)
+            self._pending.daemon = True
+            self._pending.start()
+            atexit.register(self._flush_edit)
+
+    def _flush_edit(self) -> None:
+        """Send the current state now if it differs from the last one sent."""
+        with self._timer_lock:
+            if self._pending is not None:
+                self._pending.cancel()
+                self._pending = None
+                atexit.unregister(self._flush_edit)
+        if self.message_id is None:
+            return
+        with self._send_lock:
+            text = self._build_text()
+            if text == self._last_text:
+                return
+            try:
+                edit_message(self.message_id, text)
+                self._last_text = text
+            except Exception:
+                logger.debug("ProgressTracker._update: edit failed", exc_info=True)
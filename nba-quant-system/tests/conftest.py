@@ -0,0 +1,89 @@
+"""Shared pytest fixtures."""
+from __future__ import annotations
+
+import os
+from unittest import mock
+
+import pytest
+
+from app import supabase_client
+
+
+_SUPABASE_ENV = ("SUPABASE_URL", "SUPABASE_KEY")
+_saved_env: dict[str, str | None] = {}
+
+
+def pytest_configure(config):
+    """Hide Supabase credentials before any test module is imported."""
+    _saved_env.update((k, os.environ.pop(k, None)) for k in _SUPABASE_ENV)
+
+
+def pytest_unconfigure(config):
+    """Restore the credentials hidden by pytest_configure."""
+    for k, v in _saved_env.items():
+        if v is not None:
+            os.environ[k] = v
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _stub_supabase():
+    """Start the session with Supabase marked as not configured.
+
+    Tests that drive ``supabase_client`` state directly opt into
+    ``reset_supabase_client`` to get a clean slate.
+    """
+    supabase_client._client = None
+    supabase_client._available = False
+    yield
+
+
+@pytest.fixture
+def reset_supabase_client(monkeypatch):
+    """Clear the cached Supabase client; monkeypatch restores it on teardown."""
+    monkeypatch.setattr(supabase_client, "_client", None)
+    monkeypatch.setattr(supabase_client, "_available", None)
+
+
+@pytest.fixture
+def fake_supabase_client(monkeypatch):
+    """Install a fresh MagicMock as the configured Supabase client."""
+    client = mock.MagicMock()
+    monkeypatch.setattr(supabase_client, "_client", client)
+    monkeypatch.setattr(supabase_client, "_available", True)
+    return client
+
+
+class _FailingQuery:
+    """Query builder stand-in whose ``execute()`` always raises."""
+
+    __slots__ = ("_exc",)
+
+    def __init__(self, exc):
+        self._exc = exc
+
+    def _chain(self, *args, **kwargs):
+        return self
+
+    insert = upsert = update = select = eq = order = range = limit = _chain
+
+    def execute(self):
+        raise self._exc
+
+
+class _FailingClient:
+    __slots__ = ("_exc",)
+
+    def __init__(self, exc):
+        self._exc = exc
+
+    def table(self, name):
+        return _FailingQuery(self._exc)
+
+
+@pytest.fixture
+def failing_supabase_client(monkeypatch):
+    """Install a configured Supabase client whose every query fails."""
+    client = _FailingClient(RuntimeError("write failed"))
+    monkeypatch.setattr(supabase_client, "_client", client)
+    monkeypatch.setattr(supabase_client, "_available", True)
+    return client
@@ -1,69 +1,81 @@
 """Tests for backfill_review_games and supporting helpers."""
 from __future__ import annotations
 
-import os
 from unittest import mock
 
 import pytest
 
-os.environ.pop("SUPABASE_URL", None)
-os.environ.pop("SUPABASE_KEY", None)
-
 from app import supabase_client
 
 
-@pytest.fixture(autouse=True)
-def _reset_client():
-    """Reset module-level state between tests."""
-    supabase_client._client = None
-    supabase_client._available = None
-    yield
-    supabase_client._client = None
-    supabase_client._available = None
+pytestmark = pytest.mark.usefixtures("reset_supabase_client")
 
 
 # ---------- fetch_all_predictions ----------
 
 class TestFetchAllPredictions:
-    def test_returns_all_rows(self):
-        fake_client = mock.MagicMock()
-        fake_client.table.return_value.select.return_value.order.return_value.execute.return_value.data = [
+    def test_returns_all_rows(self, fake_supabase_client):
+        fake_supabase_client.table.return_value.select.return_value.order.return_value.order.return_value.range.return_value.execute.return_value.data = [
             {"id": 1, "game_id": 100, "payload": {}, "game_date": None},
             {"id": 2, "game_id": 200, "payload": {}, "game_date": "2025-01-15"},
         ]
-        supabase_client._client = fake_client
-        supabase_client._available = True
 
         results = supabase_client.fetch_all_predictions()
         assert len(results) == 2
         assert results[0]["game_id"] == 100
         assert results[1]["game_id"] == 200
 
+    def test_reads_all_pages(self, fake_supabase_client):
+        ranged = fake_supabase_client.table.return_value.select.return_value.order.return_value.order.return_value.range
+        ranged.return_value.execute.side_effect = [
+            mock.MagicMock(data=[{"game_id": 1}, {"game_id": 2}]),
+            mock.MagicMock(data=[{"game_id": 3}]),
+        ]
+
+        with mock.patch.object(supabase_client, "_PAGE_SIZE", 2):
+            results = supabase_client.fetch_all_predictions()
+        assert [r["game_id"] for r in results] == [1, 2, 3]
+        assert ranged.call_args_list == [mock.call(0, 1), mock.call(2, 3)]
+
+    def test_orders_by_id_within_created_at(self, fake_supabase_client):
+        ordered = fake_supabase_client.table.return_value.select.return_value.order
+        ordered.return_value.order.return_value.range.return_value.execute.return_value.data = []
+
+        supabase_client.fetch_all_predictions()
+        ordered.assert_called_once_with("created_at", desc=True)
+        ordered.return_value.order.assert_called_once_with("id", desc=True)
+
+    def test_returns_rows_read_before_a_later_page_fails(self, fake_supabase_client):
+        ranged = fake_supabase_client.table.return_value.select.return_value.order.return_value.order.return_value.range
+        ranged.return_value.execute.side_effect = [
+            mock.MagicMock(data=[{"game_id": 1}, {"game_id": 2}]),
+            RuntimeError("boom"),
+        ]
+
+        with mock.patch.object(supabase_client, "_PAGE_SIZE", 2):
+            results = supabase_client.fetch_all_predictions()
+        assert [r["game_id"] for r in results] == [1, 2]
+
     def test_returns_empty_when_not_configured(self):
         supabase_client._available = False
         assert supabase_client.fetch_all_predictions() == []
 
+    @pytest.mark.usefixtures("failing_supabase_client")
     def test_returns_empty_on_error(self):
-        fake_client = mock.MagicMock()
-        fake_client.table.return_value.select.return_value.order.return_value.execute.side_effect = RuntimeError("fail")
-        supabase_client._client = fake_client
-        supabase_client._available = True
         assert supabase_client.fetch_all_predictions() == []
 
 
 # ---------- update_prediction_game_date ----------
 
 class TestUpdatePredictionGameDate:
-    def test_updates_game_date(self):
-        fake_client = mock.MagicMock()
-        supabase_client._client = fake_client
-        supabase_client._available = True
-
+    def test_updates_game_date(self, fake_supabase_client):
         supabase_client.update_prediction_game_date(1, "2025-02-01")
 
-        fake_client.table.assert_called_with("predictions")
-        fake_client.table.return_value.update.assert_called_once_with({"game_date": "2025-02-01"})
-        fake_client.table.return_value.update.return_value.eq.assert_called_once_with("id", 1)
+        fake_supabase_client.table.assert_called_with("predictions")
+        fake_supabase_client.table.return_value.update.assert_called_once_with(
+            {"game_date": "2025-02-01"}, returning="minimal"
+        )
+        fake_supabase_client.table.return_value.update.return_value.eq.assert_called_once_with("id", 1)
 
     def test_skips_when_not_configured(self):
         supabase_client._available = False
@@ -113,14 +125,11 @@ class TestGetGame:
 # ---------- backfill_review_games ----------
 
 class TestBackfillReviewGames:
-    def test_backfill_updates_missing_game_date(self):
+    def test_backfill_updates_missing_game_date(self, fake_supabase_client):
         """Predictions with game_date=None get updated from API."""
-        fake_client = mock.MagicMock()
-        fake_client.table.return_value.select.return_value.order.return_value.execute.return_value.data = [
+        fake_supabase_client.table.return_value.select.return_value.order.return_value.order.return_value.range.return_value.execute.return_value.data = [
             {"id": 1, "game_id": 42, "payload": {}, "game_date": None},
         ]
-        supabase_client._client = fake_client
-        supabase_client._available = True
 
         game_resp = {
             "id": 42,
@@ -138,21 +147,18 @@ class TestBackfillReviewGames:
             result = backfill_review_games()
 
         # Verify update was called with correct args
-        update_chain = fake_client.table.return_value.update
-        update_chain.assert_called_with({"game_date": "2025-01-15"})
+        update_chain = fake_supabase_client.table.return_value.update
+        update_chain.assert_called_with({"game_date": "2025-01-15"}, returning="minimal")
         update_chain.return_value.eq.assert_called_with("id", 1)
 
         assert len(result) == 1
         assert result[0]["status"] == "Final"
 
-    def test_backfill_skips_update_when_game_date_exists(self):
+    def test_backfill_skips_update_when_game_date_exists(self, fake_supabase_client):
         """Predictions with existing game_date are not updated."""
-        fake_client = mock.MagicMock()
-        fake_client.table.return_value.select.return_value.order.return_value.execute.return_value.data = [
+        fake_supabase_client.table.return_value.select.return_value.order.return_value.order.return_value.range.return_value.execute.return_value.data = [
             {"id": 1, "game_id": 42, "payload": {}, "game_date": "2025-01-15"},
         ]
-        supabase_client._client = fake_client
-        supabase_client._available = True
 
         game_resp = {
             "id": 42,
@@ -171,7 +177,7 @@ class TestBackfillReviewGames:
 
         # update should NOT have been called for the game_date column
         update_calls = [
-            c for c in fake_client.table.return_value.update.call_args_list
+            c for c in fake_supabase_client.table.return_value.update.call_args_list
             if c[0][0].get("game_date")
         ]
         assert len(update_calls) == 0
@@ -179,14 +185,11 @@ class TestBackfillReviewGames:
         # But Final game should still be returned
         assert len(result) == 1
 
-    def test_backfill_excludes_non_final_games(self):
+    def test_backfill_excludes_non_final_games(self, fake_supabase_client):
         """Only Final games are returned."""
-        fake_client = mock.MagicMock()
-        fake_client.table.return_value.select.return_value.order.return_value.execute.return_value.data = [
+        fake_supabase_client.table.return_value.select.return_value.order.return_value.order.return_value.range.return_value.execute.return_value.data = [
             {"id": 1, "game_id": 42, "payload": {}, "game_date": "2025-01-15"},
         ]
-        supabase_client._client = fake_client
-        supabase_client._available = True
 
         game_resp = {
             "id": 42,
@@ -215,15 +218,12 @@ class TestBackfillReviewGames:
 
         assert result == []
 
-    def test_backfill_continues_on_api_error(self):
+    def test_backfill_continues_on_api_error(self, fake_supabase_client):
         """API errors for individual games don't crash the backfill."""
-        fake_client = mock.MagicMock()
-        fake_client.table.return_value.select.return_value.order.return_value.execute.return_value.data = [
+        fake_supabase_client.table.return_value.select.return_value.order.return_value.order.return_value.range.return_value.execute.return_value.data = [
             {"id": 1, "game_id": 42, "payload": {}, "game_date": None},
             {"id": 2, "game_id": 43, "payload": {}, "game_date": None},
         ]
-        supabase_client._client = fake_client
-        supabase_client._available = True
 
         game_resp = {
             "id": 43,
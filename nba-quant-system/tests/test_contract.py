@@ -1,64 +1,43 @@
 """Tests for NBA quant system contract requirements."""
 from __future__ import annotations
 
-import os
+import json
+from functools import lru_cache
+from pathlib import Path
 from unittest import mock
 
-import numpy as np
 import pytest
 
-os.environ.pop("SUPABASE_URL", None)
-os.environ.pop("SUPABASE_KEY", None)
-
 from app import supabase_client
-
-
-@pytest.fixture(autouse=True)
-def _reset_supabase():
-    supabase_client._client = None
-    supabase_client._available = None
-    yield
-    supabase_client._client = None
-    supabase_client._available = None
+from app.game_simulator import run_possession_simulation
+from app.i18n_cn import cn
+from app.rating_engine import (
+    _edge_to_stars,
+    compute_edge_score,
+    compute_ev,
+    compute_kelly_stake,
+    stars_display,
+)
+from app.review_engine import _deduplicate_predictions, run_review
 
 
 # ---------- Star rating thresholds (Requirement 6) ----------
 
 class TestStarRating:
-    def test_edge_to_stars_5_at_15(self):
-        from app.rating_engine import _edge_to_stars
-        assert _edge_to_stars(15.0) == 5
-
-    def test_edge_to_stars_5_above_15(self):
-        from app.rating_engine import _edge_to_stars
-        assert _edge_to_stars(20.0) == 5
-
-    def test_edge_to_stars_4_at_12(self):
-        from app.rating_engine import _edge_to_stars
-        assert _edge_to_stars(12.0) == 4
-
-    def test_edge_to_stars_4_at_14(self):
-        from app.rating_engine import _edge_to_stars
-        assert _edge_to_stars(14.9) == 4
-
-    def test_edge_to_stars_3_at_9(self):
-        from app.rating_engine import _edge_to_stars
-        assert _edge_to_stars(9.0) == 3
-
-    def test_edge_to_stars_2_at_7(self):
-        from app.rating_engine import _edge_to_stars
-        assert _edge_to_stars(7.0) == 2
-
-    def test_edge_to_stars_1_at_5(self):
-        from app.rating_engine import _edge_to_stars
-        assert _edge_to_stars(5.0) == 1
-
-    def test_edge_to_stars_0_below_5(self):
-        from app.rating_engine import _edge_to_stars
-        assert _edge_to_stars(4.9) == 0
+    @pytest.mark.parametrize("edge,expected", [
+        (15.0, 5),
+        (20.0, 5),
+        (12.0, 4),
+        (14.9, 4),
+        (9.0, 3),
+        (7.0, 2),
+        (5.0, 1),
+        (4.9, 0),
+    ])
+    def test_edge_to_stars(self, edge, expected):
+        assert _edge_to_stars(edge) == expected
 
     def test_stars_display(self):
-        from app.rating_engine import stars_display
         assert stars_display(5) == "★★★★★"
         assert stars_display(3) == "★★★"
         assert stars_display(1) == "★"
@@ -69,29 +48,24 @@ class TestStarRating:
 
 class TestEdgeScoring:
     def test_compute_edge_score_basic(self):
-        from app.rating_engine import compute_edge_score
         # 60% probability vs 50% implied = 10% edge
         score = compute_edge_score(0.60, 0.50)
         assert score == 10.0
 
     def test_compute_edge_score_zero(self):
-        from app.rating_engine import compute_edge_score
         score = compute_edge_score(0.50, 0.50)
         assert score == 0.0
 
     def test_compute_edge_score_capped_at_100(self):
-        from app.rating_engine import compute_edge_score
         score = compute_edge_score(1.0, 0.0)
         assert score == 100.0
 
     def test_compute_ev_positive(self):
-        from app.rating_engine import compute_ev
         # 60% prob, 1.91 odds → EV = 0.60 * 1.91 - 1 = 0.146
         ev = compute_ev(0.60, 1.91)
         assert ev > 0
 
     def test_compute_ev_negative(self):
-        from app.rating_engine import compute_ev
         # 40% prob, 1.91 odds → EV = 0.40 * 1.91 - 1 = -0.236
         ev = compute_ev(0.40, 1.91)
         assert ev < 0
@@ -101,19 +75,16 @@ class TestEdgeScoring:
 
 class TestKellyStake:
     def test_kelly_positive_edge(self):
-        from app.rating_engine import compute_kelly_stake
         result = compute_kelly_stake(0.60, 1.91, bankroll=10000.0)
         assert result["recommended_stake"] > 0
         assert result["bankroll_after_bet"] < 10000.0
 
     def test_kelly_negative_edge(self):
-        from app.rating_engine import compute_kelly_stake
         result = compute_kelly_stake(0.40, 1.91, bankroll=10000.0)
         assert result["recommended_stake"] == 0.0
         assert result["bankroll_after_bet"] == 10000.0
 
     def test_kelly_half_fraction(self):
-        from app.rating_engine import compute_kelly_stake
         full = compute_kelly_stake(0.60, 1.91, bankroll=10000.0, fraction=1.0)
         half = compute_kelly_stake(0.60, 1.91, bankroll=10000.0, fraction=0.5)
         assert abs(half["recommended_stake"] - full["recommended_stake"] / 2) < 0.01
@@ -134,7 +105,6 @@ class TestMonteCarlo:
             spread_line=-3.5,
         )
         defaults.update(overrides)
-        from app.game_simulator import run_possession_simulation
         return run_possession_simulation(**defaults)
 
     def test_simulation_returns_home_win_probability(self):
@@ -201,12 +171,17 @@ class TestMonteCarlo:
         assert result["simulation_low"] == result["total_5pct"]
         assert result["simulation_high"] == result["total_95pct"]
 
+    @pytest.mark.parametrize("n_sim", [0, -5])
+    def test_rejects_non_positive_n_sim(self, n_sim):
+        """n_sim < 1 is rejected up front instead of dividing by zero."""
+        with pytest.raises(ValueError, match="n_sim"):
+            self._make_sim(n_sim=n_sim)
+
 
 # ---------- Chinese language (Requirement 2) ----------
 
 class TestChineseOutput:
     def test_model_status_report_no_english_mae(self):
-        from app.i18n_cn import cn
         report = cn("model_status_report",
                      version="v5", available="✅",
                      training_samples=500,
@@ -217,7 +192,6 @@ class TestChineseOutput:
         assert "平均误差" in report
 
     def test_model_status_report_matches_contract(self):
-        from app.i18n_cn import cn
         report = cn("model_status_report",
                      version="v5", available="✅",
                      training_samples=500,
@@ -233,11 +207,9 @@ class TestChineseOutput:
         assert "最后训练时间" in report
 
     def test_model_loaded_string_matches_contract(self):
-        from app.i18n_cn import cn
         assert "Supabase已加载" in cn("model_loaded")
 
     def test_review_no_games_message(self):
-        from app.i18n_cn import cn
         msg = cn("review_no_games")
         assert "复盘系统" in msg
         assert "当前没有可复盘比赛" in msg
@@ -246,8 +218,19 @@ class TestChineseOutput:
 
 # ---------- Review safety (Requirement 9) ----------
 
+_GAME_RESULT = {
+    "home_team": "Los Angeles Lakers",
+    "visitor_team": "Golden State Warriors",
+    "home_score": 110,
+    "visitor_score": 105,
+    "spread": 0,
+    "total": 0,
+}
+
+
+@pytest.mark.usefixtures("reset_supabase_client")
 class TestReviewSafety:
-    def test_review_generates_report_with_predictions(self, tmp_path):
+    def test_review_generates_report_with_predictions(self, tmp_path, monkeypatch):
         """Review generates review_latest.json when predictions exist."""
         predictions = [
             {
@@ -264,28 +247,12 @@ class TestReviewSafety:
         review_rows = [
             {"game_id": 1, "ou_hit": True},
         ]
-        with mock.patch("app.review_engine.load_latest_predictions", return_value=predictions):
-            with mock.patch("app.review_engine.fetch_game_result") as mock_fetch:
-                mock_fetch.return_value = {
-                    "home_team": "Los Angeles Lakers",
-                    "visitor_team": "Golden State Warriors",
-                    "home_score": 110,
-                    "visitor_score": 105,
-                    "spread": 0,
-                    "total": 0,
-                }
-                with mock.patch("app.supabase_client.save_review_result"):
-                    with mock.patch("app.supabase_client.fetch_recent_review_results", return_value=review_rows):
-                        import os
-                        old_cwd = os.getcwd()
-                        os.chdir(tmp_path)
-                        try:
-                            from app.review_engine import run_review
-                            run_review()
-                        finally:
-                            os.chdir(old_cwd)
-
-        import json
+        monkeypatch.setattr("app.review_engine.load_latest_predictions", lambda: predictions)
+        monkeypatch.setattr("app.review_engine.fetch_game_result", lambda game_id: _GAME_RESULT)
+        monkeypatch.setattr("app.supabase_client.save_review_result", mock.MagicMock())
+        monkeypatch.setattr("app.supabase_client.fetch_recent_review_results", lambda: review_rows)
+        run_review(output_dir=tmp_path)
+
         report = json.loads((tmp_path / "review_latest.json").read_text())
         assert report["review_count"] == 1
         assert "ou_hit_rate" in report
@@ -294,11 +261,10 @@ class TestReviewSafety:
         """Review loads predictions from predictions via load_latest_predictions."""
         with mock.patch("app.review_engine.load_latest_predictions", return_value=[]) as mock_load:
             with mock.patch("app.supabase_client.fetch_recent_review_results", return_value=[]):
-                from app.review_engine import run_review
                 run_review()  # empty predictions should not crash
                 mock_load.assert_called_once()
 
-    def test_review_writes_to_review_results(self):
+    def test_review_writes_to_review_results(self, monkeypatch):
         """Review engine persists results via save_review_result."""
         predictions = [
             {
@@ -312,23 +278,15 @@ class TestReviewSafety:
                 },
             },
         ]
-        with mock.patch("app.review_engine.load_latest_predictions", return_value=predictions):
-            with mock.patch("app.review_engine.fetch_game_result") as mock_fetch:
-                mock_fetch.return_value = {
-                    "home_team": "Los Angeles Lakers",
-                    "visitor_team": "Golden State Warriors",
-                    "home_score": 110,
-                    "visitor_score": 105,
-                    "spread": 0,
-                    "total": 0,
-                }
-                with mock.patch("app.supabase_client.save_review_result") as mock_save:
-                    with mock.patch("app.supabase_client.fetch_recent_review_results", return_value=[]):
-                        from app.review_engine import run_review
-                        run_review()
-                        mock_save.assert_called_once()
-
-    def test_review_computes_rates_from_review_results(self):
+        mock_save = mock.MagicMock()
+        monkeypatch.setattr("app.review_engine.load_latest_predictions", lambda: predictions)
+        monkeypatch.setattr("app.review_engine.fetch_game_result", lambda game_id: _GAME_RESULT)
+        monkeypatch.setattr("app.supabase_client.save_review_result", mock_save)
+        monkeypatch.setattr("app.supabase_client.fetch_recent_review_results", lambda: [])
+        run_review()
+        mock_save.assert_called_once()
+
+    def test_review_computes_rates_from_review_results(self, tmp_path):
         """Hit rates are computed from review_results, not predictions."""
         review_rows = [
             {"game_id": 1, "ou_hit": False},
@@ -336,25 +294,16 @@ class TestReviewSafety:
         ]
         with mock.patch("app.review_engine.load_latest_predictions", return_value=[]):
             with mock.patch("app.supabase_client.fetch_recent_review_results", return_value=review_rows):
-                from app.review_engine import run_review
-                import os, json, tempfile
-                with tempfile.TemporaryDirectory() as td:
-                    old_cwd = os.getcwd()
-                    os.chdir(td)
-                    try:
-                        run_review()
-                        report = json.loads(open("review_latest.json").read())
-                    finally:
-                        os.chdir(old_cwd)
-                assert report["review_count"] == 2
-                assert report["ou_hit_rate"] == 0.5
+                run_review(output_dir=tmp_path)
+        report = json.loads((tmp_path / "review_latest.json").read_text())
+        assert report["review_count"] == 2
+        assert report["ou_hit_rate"] == 0.5
 
 
 # ---------- Deduplication helper ----------
 
 class TestDeduplicatePredictions:
     def test_keeps_latest_per_game_id(self):
-        from app.review_engine import _deduplicate_predictions
         preds = [
             {"game_id": 1, "created_at": "2025-01-15T01:00:00", "payload": "old"},
             {"game_id": 1, "created_at": "2025-01-15T02:00:00", "payload": "new"},
@@ -367,16 +316,13 @@ class TestDeduplicatePredictions:
         assert by_gid[2]["payload"] == "only"
 
     def test_single_prediction_unchanged(self):
-        from app.review_engine import _deduplicate_predictions
         preds = [{"game_id": 1, "created_at": "2025-01-15T01:00:00"}]
         assert _deduplicate_predictions(preds) == preds
 
     def test_empty_list(self):
-        from app.review_engine import _deduplicate_predictions
         assert _deduplicate_predictions([]) == []
 
     def test_missing_created_at_treated_as_empty_string(self):
-        from app.review_engine import _deduplicate_predictions
         preds = [
             {"game_id": 1, "payload": "no_ts"},
             {"game_id": 1, "created_at": "2025-01-15T01:00:00", "payload": "with_ts"},
@@ -388,20 +334,26 @@ class TestDeduplicatePredictions:
 
 # ---------- Supabase fetch predictions (Requirement 10/13) ----------
 
+@pytest.mark.usefixtures("reset_supabase_client")
 class TestSupabaseFetchPredictions:
-    def test_fetch_predictions_for_date_returns_matching(self):
-        fake_client = mock.MagicMock()
-        fake_client.table.return_value.select.return_value.execute.return_value.data = [
+    def test_fetch_predictions_for_date_returns_matching(self, fake_supabase_client):
+        query = fake_supabase_client.table.return_value.select.return_value
+        query.eq.return_value.eq.return_value.execute.return_value.data = [
             {"payload": {"game_date": "2025-01-15", "game_id": 42, "is_final_prediction": True}},
-            {"payload": {"game_date": "2025-01-14", "game_id": 41, "is_final_prediction": True}},
         ]
-        supabase_client._client = fake_client
-        supabase_client._available = True
-
         results = supabase_client.fetch_predictions_for_date("2025-01-15")
         assert len(results) == 1
         assert results[0]["game_id"] == 42
 
+    def test_fetch_predictions_for_date_filters_on_server(self, fake_supabase_client):
+        query = fake_supabase_client.table.return_value.select.return_value
+        query.eq.return_value.eq.return_value.execute.return_value.data = []
+        supabase_client.fetch_predictions_for_date("2025-01-15")
+        query.eq.assert_called_once_with("payload->>game_date", "2025-01-15")
+        query.eq.return_value.eq.assert_called_once_with(
+            "payload->>is_final_prediction", "true"
+        )
+
     def test_fetch_predictions_for_date_empty_when_not_configured(self):
         supabase_client._available = False
         results = supabase_client.fetch_predictions_for_date("2025-01-15")
@@ -410,14 +362,19 @@ class TestSupabaseFetchPredictions:
 
 # ---------- Workflow schedule (Requirement 11) ----------
 
+@lru_cache(maxsize=1)
+def _load_review_workflow() -> dict:
+    """Parse ``review.yml`` once and share it across schedule tests."""
+    import yaml
+    repo_root = Path(__file__).resolve().parent.parent.parent
+    with open(repo_root / ".github" / "workflows" / "review.yml") as f:
+        return yaml.safe_load(f)
+
+
 class TestWorkflowSchedule:
     def test_review_workflow_scheduled_at_7_utc(self):
         """Review workflow should be scheduled at 7:00 UTC."""
-        import yaml
-        from pathlib import Path
-        repo_root = Path(__file__).resolve().parent.parent.parent
-        with open(repo_root / ".github" / "workflows" / "review.yml") as f:
-            wf = yaml.safe_load(f)
+        wf = _load_review_workflow()
         # PyYAML parses 'on' as True; try both
         on_key = wf.get("on") or wf.get(True)
         schedules = on_key["schedule"]
@@ -1,181 +1,137 @@
 """Tests for ensure_models() model source logic in retrain_engine."""
 from __future__ import annotations
 
-import os
+from types import SimpleNamespace
 from unittest import mock
 
 import pytest
 
-os.environ.pop("SUPABASE_URL", None)
-os.environ.pop("SUPABASE_KEY", None)
+from app.prediction_models import ModelBundle
+from app.retrain_engine import MIN_RETRAIN_GAMES, ensure_models
 
-from app import supabase_client
 
+def _bundle(version):
+    return SimpleNamespace(version=version, source="unknown")
 
-@pytest.fixture(autouse=True)
-def _reset_supabase():
-    supabase_client._client = None
-    supabase_client._available = None
-    yield
-    supabase_client._client = None
-    supabase_client._available = None
 
+def _trained_bundle():
+    return SimpleNamespace(version="v6", algorithm="lightgbm", metrics={},
+                           duration=1.0, source="unknown")
 
-# ---------- ensure_models: cached local model ----------
 
-def test_ensure_models_returns_cached_when_local_exists():
-    """When models exist locally, ensure_models returns them with 'Using cached model' source."""
-    fake_bundle = mock.MagicMock()
-    fake_bundle.version = "v5"
+class _FakeDF:
+    """Stands in for the training frame: non-empty, one sample."""
+    __slots__ = ()
+    empty = False
 
-    with mock.patch("app.retrain_engine.load_models", return_value=fake_bundle):
-        from app.retrain_engine import ensure_models
-        result = ensure_models(force=False)
+    def __len__(self):
+        return 1
 
-    assert result is fake_bundle
-    assert result.source == "cached"
 
+FAKE_DF = _FakeDF()
 
-# ---------- ensure_models: loaded from Supabase ----------
 
-def test_ensure_models_downloads_from_supabase_when_local_missing():
-    """When local models are missing but Supabase has them, source is 'Loaded from Supabase'."""
-    fake_bundle = mock.MagicMock()
-    fake_bundle.version = "v3"
+@pytest.fixture
+def retrain(monkeypatch):
+    """Replace ensure_models() collaborators with mocks.
 
-    # First call: no local models; second call (after download): models available
-    with mock.patch("app.retrain_engine.load_models", side_effect=[None, fake_bundle]):
-        with mock.patch("app.supabase_client.download_models_from_storage", return_value=True):
-            from app.retrain_engine import ensure_models
-            result = ensure_models(force=False)
+    Defaults describe a clean slate: no local or remote models, enough
+    new games, and a training run whose upload succeeds.  Tests adjust
+    the mocks on the returned namespace.
+    """
+    ns = SimpleNamespace(
+        load_models=mock.Mock(return_value=None),
+        download_models_from_storage=mock.Mock(return_value=False),
+        upload_models_to_storage=mock.Mock(return_value=True),
+        _db_has_completed_games=mock.Mock(return_value=True),
+        _count_new_finished_games=mock.Mock(return_value=100),
+        bootstrap_historical_data=mock.Mock(),
+        build_training_frame=mock.Mock(return_value=FAKE_DF),
+        train_models=mock.Mock(return_value=_trained_bundle()),
+    )
+    monkeypatch.setattr("app.supabase_client.download_models_from_storage", ns.download_models_from_storage)
+    monkeypatch.setattr("app.supabase_client.upload_models_to_storage", ns.upload_models_to_storage)
+    monkeypatch.setattr("app.retrain_engine.load_models", ns.load_models)
+    monkeypatch.setattr("app.retrain_engine._db_has_completed_games", ns._db_has_completed_games)
+    monkeypatch.setattr("app.retrain_engine._count_new_finished_games", ns._count_new_finished_games)
+    monkeypatch.setattr("app.retrain_engine.bootstrap_historical_data", ns.bootstrap_historical_data)
+    monkeypatch.setattr("app.retrain_engine.build_training_frame", ns.build_training_frame)
+    monkeypatch.setattr("app.retrain_engine.train_models", ns.train_models)
+    monkeypatch.setattr("app.retrain_engine.FEATURE_COLUMNS", ["f"] * 50)
+    return ns
 
-    assert result is fake_bundle
-    assert result.source == "supabase"
 
+# ---------- ensure_models: model source without training ----------
 
-# ---------- ensure_models: force retrain even when cached ----------
+@pytest.mark.parametrize("loads,downloaded,force,source", [
+    (["v5"], False, False, "cached"),
+    # First call: no local models; second call (after download): models available
+    ([None, "v3"], True, False, "supabase"),
+    # First call returns cached (skipped due to force), second returns restored
+    (["v5", "v7"], True, True, "supabase"),
+], ids=["cached_when_local_exists", "supabase_when_local_missing",
+        "force_uses_supabase_when_available"])
+def test_ensure_models_source(retrain, loads, downloaded, force, source):
+    """ensure_models reuses local or Supabase models and tags their source."""
+    bundles = [v and _bundle(v) for v in loads]
+    retrain.load_models.side_effect = bundles
+    retrain.download_models_from_storage.return_value = downloaded
 
-def test_ensure_models_force_triggers_training():
-    """When force=True, ensure_models trains even when local models exist."""
-    fake_cached = mock.MagicMock()
-    fake_cached.version = "v5"
-
-    fake_trained = mock.MagicMock()
-    fake_trained.version = "v6"
-    fake_trained.algorithm = "lightgbm"
-    fake_trained.metrics = {}
-    fake_trained.duration = 1.0
-
-    fake_df = mock.MagicMock()
-    fake_df.empty = False
-
-    with mock.patch("app.retrain_engine.load_models", return_value=fake_cached):
-        with mock.patch("app.retrain_engine._db_has_completed_games", return_value=True):
-            with mock.patch("app.retrain_engine.build_training_frame", return_value=fake_df):
-                with mock.patch("app.retrain_engine.train_models", return_value=fake_trained):
-                    with mock.patch("app.retrain_engine.FEATURE_COLUMNS", ["f"] * 50):
-                        with mock.patch("app.supabase_client.upload_models_to_storage", return_value=True):
-                            with mock.patch("app.supabase_client.download_models_from_storage", return_value=False):
-                                with mock.patch("app.retrain_engine._count_new_finished_games", return_value=100):
-                                    from app.retrain_engine import ensure_models
-                                    result = ensure_models(force=True)
-
-    assert result is fake_trained
-    assert result.source == "trained"
+    result = ensure_models(force=force)
 
+    assert retrain.download_models_from_storage.call_count == int(downloaded)
+    assert result is bundles[-1]
+    assert result.source == source
 
-# ---------- ensure_models: force skips training when Supabase has models ----------
 
-def test_ensure_models_force_uses_supabase_when_available():
-    """When force=True but Supabase has models, download and use them instead of training."""
-    fake_cached = mock.MagicMock()
-    fake_cached.version = "v5"
+# ---------- ensure_models: force retrain even when cached ----------
 
-    fake_restored = mock.MagicMock()
-    fake_restored.version = "v7"
+def test_ensure_models_force_triggers_training(retrain):
+    """When force=True, ensure_models trains even when local models exist."""
+    fake_cached = _bundle("v5")
+    retrain.load_models.return_value = fake_cached
 
-    # load_models: first call returns cached (skipped due to force), second returns restored
-    with mock.patch("app.retrain_engine.load_models", side_effect=[fake_cached, fake_restored]):
-        with mock.patch("app.supabase_client.download_models_from_storage", return_value=True) as mock_download:
-            from app.retrain_engine import ensure_models
-            result = ensure_models(force=True)
+    result = ensure_models(force=True)
 
-    mock_download.assert_called_once()
-    assert result is fake_restored
-    assert result.source == "supabase"
+    assert result is retrain.train_models.return_value
+    assert result.source == "trained"
 
 
 # ---------- ensure_models: upload called after training ----------
 
-def test_ensure_models_uploads_models_after_training():
+def test_ensure_models_uploads_models_after_training(retrain):
     """After training, ensure_models uploads models to Supabase Storage."""
-    fake_trained = mock.MagicMock()
-    fake_trained.version = "v6"
-    fake_trained.algorithm = "lightgbm"
-    fake_trained.metrics = {}
-    fake_trained.duration = 1.0
-
-    fake_df = mock.MagicMock()
-    fake_df.empty = False
-
-    with mock.patch("app.retrain_engine.load_models", return_value=None):
-        with mock.patch("app.supabase_client.download_models_from_storage", return_value=False):
-            with mock.patch("app.retrain_engine._db_has_completed_games", return_value=True):
-                with mock.patch("app.retrain_engine.build_training_frame", return_value=fake_df):
-                    with mock.patch("app.retrain_engine.train_models", return_value=fake_trained):
-                        with mock.patch("app.retrain_engine.FEATURE_COLUMNS", ["f"] * 50):
-                            with mock.patch("app.supabase_client.upload_models_to_storage", return_value=True) as mock_upload:
-                                from app.retrain_engine import ensure_models
-                                result = ensure_models(force=False)
-
-    mock_upload.assert_called_once()
+    result = ensure_models(force=False)
+
+    retrain.upload_models_to_storage.assert_called_once()
     assert result.source == "trained"
 
 
-def test_ensure_models_raises_when_upload_fails():
+def test_ensure_models_raises_when_upload_fails(retrain):
     """ensure_models raises RuntimeError when model upload fails."""
-    fake_trained = mock.MagicMock()
-    fake_trained.version = "v6"
-    fake_trained.algorithm = "lightgbm"
-    fake_trained.metrics = {}
-    fake_trained.duration = 1.0
-
-    fake_df = mock.MagicMock()
-    fake_df.empty = False
-
-    with mock.patch("app.retrain_engine.load_models", return_value=None):
-        with mock.patch("app.supabase_client.download_models_from_storage", return_value=False):
-            with mock.patch("app.retrain_engine._db_has_completed_games", return_value=True):
-                with mock.patch("app.retrain_engine.build_training_frame", return_value=fake_df):
-                    with mock.patch("app.retrain_engine.train_models", return_value=fake_trained):
-                        with mock.patch("app.retrain_engine.FEATURE_COLUMNS", ["f"] * 50):
-                            with mock.patch("app.supabase_client.upload_models_to_storage", return_value=False):
-                                from app.retrain_engine import ensure_models
-                                with pytest.raises(RuntimeError, match="Failed to upload models"):
-                                    ensure_models(force=False)
+    retrain.upload_models_to_storage.return_value = False
+
+    with pytest.raises(RuntimeError, match="Failed to upload models"):
+        ensure_models(force=False)
 
 
 # ---------- ModelBundle has source attribute ----------
 
 def test_model_bundle_has_source_attribute():
     """ModelBundle initializes with source='unknown' by default."""
-    from app.prediction_models import ModelBundle
     bundle = ModelBundle(None, None, "test")
     assert bundle.source == "unknown"
 
 
 # ---------- ensure_models: skip retraining when insufficient new games ----------
 
-def test_ensure_models_skips_retrain_when_insufficient_games():
+def test_ensure_models_skips_retrain_when_insufficient_games(retrain):
     """When cached exists but fewer than MIN_RETRAIN_GAMES new games, reuse cached."""
-    fake_cached = mock.MagicMock()
-    fake_cached.version = "v5"
+    fake_cached = _bundle("v5")
+    retrain.load_models.return_value = fake_cached
+    retrain._count_new_finished_games.return_value = 10
 
-    with mock.patch("app.retrain_engine.load_models", return_value=fake_cached):
-        with mock.patch("app.supabase_client.download_models_from_storage", return_value=False):
-            with mock.patch("app.retrain_engine._count_new_finished_games", return_value=10):
-                from app.retrain_engine import ensure_models
-                result = ensure_models(force=True)
+    result = ensure_models(force=True)
 
     assert result is fake_cached
     assert result.source == "cached"
@@ -183,18 +139,15 @@ def test_ensure_models_skips_retrain_when_insufficient_games():
 
 # ---------- ensure_models: supabase load skips bootstrap ----------
 
-def test_ensure_models_supabase_skips_bootstrap():
+def test_ensure_models_supabase_skips_bootstrap(retrain):
     """When restored from Supabase, bootstrap_historical_data is never called."""
-    fake_bundle = mock.MagicMock()
-    fake_bundle.version = "v3"
+    fake_bundle = _bundle("v3")
+    retrain.load_models.side_effect = [None, fake_bundle]
+    retrain.download_models_from_storage.return_value = True
 
-    with mock.patch("app.retrain_engine.load_models", side_effect=[None, fake_bundle]):
-        with mock.patch("app.supabase_client.download_models_from_storage", return_value=True):
-            with mock.patch("app.retrain_engine.bootstrap_historical_data") as mock_bootstrap:
-                from app.retrain_engine import ensure_models
-                result = ensure_models(force=False)
+    result = ensure_models(force=False)
 
-    mock_bootstrap.assert_not_called()
+    retrain.bootstrap_historical_data.assert_not_called()
     assert result.source == "supabase"
 
 
@@ -202,5 +155,4 @@ def test_ensure_models_supabase_skips_bootstrap():
 
 def test_min_retrain_games_constant():
     """MIN_RETRAIN_GAMES is set to 50."""
-    from app.retrain_engine import MIN_RETRAIN_GAMES
     assert MIN_RETRAIN_GAMES == 50
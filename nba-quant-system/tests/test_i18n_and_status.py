@@ -1,27 +1,13 @@
 """Tests for i18n_cn module and model_status Supabase restore."""
 from __future__ import annotations
 
-import os
 from unittest import mock
 
 import pytest
 
-os.environ.pop("SUPABASE_URL", None)
-os.environ.pop("SUPABASE_KEY", None)
-
-from app import supabase_client
 from app.i18n_cn import cn
 
 
-@pytest.fixture(autouse=True)
-def _reset_supabase():
-    supabase_client._client = None
-    supabase_client._available = None
-    yield
-    supabase_client._client = None
-    supabase_client._available = None
-
-
 # ---------- i18n_cn ----------
 
 def test_cn_returns_plain_string():
@@ -64,24 +50,27 @@ def test_cn_model_status_report_template():
 
 # ---------- model_status: Supabase restore ----------
 
+MODEL_FILES_STUB = ("home_model.pkl", "away_model.pkl")
+MODEL_FILE_CONTENT = b"data"
+
+
+def _fake_download(model_dir):
+    """Stand-in for download_models_from_storage that materialises the stubs."""
+    for name in MODEL_FILES_STUB:
+        (model_dir / name).write_bytes(MODEL_FILE_CONTENT)
+    return True
+
+
 def test_model_status_tries_supabase_when_local_missing(tmp_path, monkeypatch):
     """model_status downloads from Supabase when local models are missing."""
     from app import model_status
-    model_status._cached_status = None
-
+    monkeypatch.setattr("app.model_status._cached_status", None)
     monkeypatch.setattr("app.model_status.MODEL_DIR", tmp_path)
-    monkeypatch.setattr("app.model_status.MODEL_FILES",
-                        ("home_model.pkl", "away_model.pkl"))
-
-    def fake_download(model_dir):
-        (tmp_path / "home_model.pkl").write_bytes(b"data")
-        (tmp_path / "away_model.pkl").write_bytes(b"data")
-        return True
+    monkeypatch.setattr("app.model_status.MODEL_FILES", MODEL_FILES_STUB)
 
     with mock.patch("app.supabase_client.download_models_from_storage",
-                    side_effect=fake_download):
+                    side_effect=_fake_download):
         with mock.patch("app.model_status._current_version", return_value="v3"):
             status = model_status._load_model_status()
 
     assert status["model_available"] is True
-    model_status._cached_status = None
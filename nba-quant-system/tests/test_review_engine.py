@@ -1,10 +1,15 @@
 """Tests for review_engine hit-checking and rate calculation functions."""
 from __future__ import annotations
 
+import threading
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, MagicMock
 
+import pytest
+
 from app.review_engine import (
     TEAM_CN,
+    _get_session,
     build_review_message,
     build_review_summary,
     calc_spread_hit,
@@ -13,6 +18,7 @@ from app.review_engine import (
     cn,
     extract_prediction_fields,
     fetch_game_result,
+    fetch_game_results,
     format_review_message,
     format_spread_text,
     format_total_text,
@@ -26,76 +32,25 @@ from app.review_engine import (
 
 # --- parse_prediction ---
 
-class TestParsePrediction:
-    def test_home_spread_pick(self):
-        """Positive predicted_margin yields spread_pick 'home'."""
-        row = {
-            "game_id": 1,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": 5.0, "predicted_total": 215.0},
-                    "total_rating": {"total_confidence": 60},
-                }
-            },
-        }
-        result = parse_prediction(row)
-        assert result["spread_pick"] == "home"
+def _sim_row(game_id, margin, total, confidence=None):
+    """Build a predictions row; total_rating is omitted when *confidence* is None."""
+    details = {"simulation": {"predicted_margin": margin, "predicted_total": total}}
+    if confidence is not None:
+        details["total_rating"] = {"total_confidence": confidence}
+    return {"game_id": game_id, "payload": {"details": details}}
 
-    def test_away_spread_pick(self):
-        """Negative predicted_margin yields spread_pick 'away'."""
-        row = {
-            "game_id": 2,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": -3.0, "predicted_total": 210.0},
-                    "total_rating": {"total_confidence": 60},
-                }
-            },
-        }
-        result = parse_prediction(row)
-        assert result["spread_pick"] == "away"
 
-    def test_zero_margin_yields_away(self):
-        """Zero predicted_margin yields spread_pick 'away'."""
-        row = {
-            "game_id": 3,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": 0, "predicted_total": 210.0},
-                    "total_rating": {"total_confidence": 60},
-                }
-            },
-        }
-        result = parse_prediction(row)
-        assert result["spread_pick"] == "away"
-
-    def test_over_total_pick(self):
-        """High total_confidence yields total_pick 'over'."""
-        row = {
-            "game_id": 4,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": 2.0, "predicted_total": 220.0},
-                    "total_rating": {"total_confidence": 70},
-                }
-            },
-        }
-        result = parse_prediction(row)
-        assert result["total_pick"] == "over"
-
-    def test_under_total_pick(self):
-        """Low total_confidence yields total_pick 'under'."""
-        row = {
-            "game_id": 5,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": 2.0, "predicted_total": 220.0},
-                    "total_rating": {"total_confidence": 30},
-                }
-            },
-        }
-        result = parse_prediction(row)
-        assert result["total_pick"] == "under"
+class TestParsePrediction:
+    @pytest.mark.parametrize("row,field,expected", [
+        (_sim_row(1, 5.0, 215.0, 60), "spread_pick", "home"),
+        (_sim_row(2, -3.0, 210.0, 60), "spread_pick", "away"),
+        (_sim_row(3, 0, 210.0, 60), "spread_pick", "away"),
+        (_sim_row(4, 2.0, 220.0, 70), "total_pick", "over"),
+        (_sim_row(5, 2.0, 220.0, 30), "total_pick", "under"),
+    ], ids=["home_spread", "away_spread", "zero_margin_away", "over_total", "under_total"])
+    def test_picks(self, row, field, expected):
+        """Margin sign drives spread_pick; total_confidence > 50 drives total_pick."""
+        assert parse_prediction(row)[field] == expected
 
     def test_missing_payload_defaults(self):
         """Missing payload falls back to 'away' and 'under'."""
@@ -108,225 +63,90 @@ class TestParsePrediction:
 
     def test_returns_game_id(self):
         """Returned dict contains game_id from input row."""
-        row = {
-            "game_id": 99,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": 1.0, "predicted_total": 200.0},
-                    "total_rating": {"total_confidence": 55},
-                }
-            },
-        }
-        result = parse_prediction(row)
+        result = parse_prediction(_sim_row(99, 1.0, 200.0, 55))
         assert result["game_id"] == 99
 
 
 # --- spread_hit ---
 
 class TestSpreadHit:
-    def test_home_covers(self):
-        """Home team wins by more than the spread."""
-        row = {
-            "final_home_score": 110,
-            "final_visitor_score": 100,
-            "spread": 5,
-            "spread_pick": "home",
-        }
-        assert spread_hit(row) is True
-
-    def test_home_does_not_cover(self):
-        """Home team wins but does not cover the spread."""
+    @pytest.mark.parametrize("home,visitor,spread,pick,expected", [
+        (110, 100, 5, "home", True),
+        (103, 100, 5, "home", False),
+        (100, 105, -3, "away", True),
+        (110, 100, -3, "away", False),
+        (110, 100, 0, "unknown", False),
+        (105, 100, 5, "home", False),
+        (110, 100, None, None, False),
+    ], ids=[
+        "home_covers", "home_does_not_cover", "away_covers",
+        "away_does_not_cover", "unknown_side", "exact_margin_equals_spread_home",
+        "unknown_side_without_line",
+    ])
+    def test_spread_hit(self, home, visitor, spread, pick, expected):
         row = {
-            "final_home_score": 103,
-            "final_visitor_score": 100,
-            "spread": 5,
-            "spread_pick": "home",
+            "final_home_score": home,
+            "final_visitor_score": visitor,
+            "spread": spread,
+            "spread_pick": pick,
         }
-        assert spread_hit(row) is False
-
-    def test_away_covers(self):
-        """Away side covers when margin is less than spread."""
-        row = {
-            "final_home_score": 100,
-            "final_visitor_score": 105,
-            "spread": -3,
-            "spread_pick": "away",
-        }
-        assert spread_hit(row) is True
-
-    def test_away_does_not_cover(self):
-        """Away side does not cover when margin exceeds spread."""
-        row = {
-            "final_home_score": 110,
-            "final_visitor_score": 100,
-            "spread": -3,
-            "spread_pick": "away",
-        }
-        assert spread_hit(row) is False
-
-    def test_unknown_side_returns_false(self):
-        """Unknown spread_pick returns False."""
-        row = {
-            "final_home_score": 110,
-            "final_visitor_score": 100,
-            "spread": 0,
-            "spread_pick": "unknown",
-        }
-        assert spread_hit(row) is False
-
-    def test_exact_margin_equals_spread_home(self):
-        """Margin exactly equals spread — not a hit for home."""
-        row = {
-            "final_home_score": 105,
-            "final_visitor_score": 100,
-            "spread": 5,
-            "spread_pick": "home",
-        }
-        assert spread_hit(row) is False
+        assert spread_hit(row) is expected
 
 
 # --- total_hit ---
 
 class TestTotalHit:
-    def test_over_hits(self):
-        """Actual total exceeds the line."""
-        assert total_hit("over", 115, 110, 220) is True
-
-    def test_over_misses(self):
-        """Actual total is under the line."""
-        assert total_hit("over", 100, 105, 220) is False
-
-    def test_under_hits(self):
-        """Actual total is below the line."""
-        assert total_hit("under", 100, 105, 220) is True
-
-    def test_under_misses(self):
-        """Actual total exceeds the line."""
-        assert total_hit("under", 115, 110, 220) is False
-
-    def test_unknown_total_returns_false(self):
-        """Unknown total_pick returns False."""
-        assert total_hit("", 110, 100, 220) is False
-
-    def test_exact_total_equals_line_over(self):
-        """Total exactly equals line — not a hit for over."""
-        assert total_hit("over", 110, 110, 220) is False
+    @pytest.mark.parametrize("pick,home,away,line,expected", [
+        ("over", 115, 110, 220, True),
+        ("over", 100, 105, 220, False),
+        ("under", 100, 105, 220, True),
+        ("under", 115, 110, 220, False),
+        ("", 110, 100, 220, False),
+        ("over", 110, 110, 220, False),
+        (None, 110, 100, None, False),
+    ], ids=[
+        "over_hits", "over_misses", "under_hits", "under_misses",
+        "unknown_pick", "exact_total_equals_line_over", "unknown_pick_without_line",
+    ])
+    def test_total_hit(self, pick, home, away, line, expected):
+        assert total_hit(pick, home, away, line) is expected
 
 
 # --- calculate_rates ---
 
-class TestCalculateRates:
-    def test_empty_rows(self):
-        """Empty input returns all zeros."""
-        assert calculate_rates([]) == (0, 0)
-
-    def test_all_hits(self):
-        """100% hit rate returns 1.0 for all rates."""
-        rows = [
-            {"ou_hit": True},
-            {"ou_hit": True},
-        ]
-        t, o = calculate_rates(rows)
-        assert t == 1.0
-        assert o == 1.0
-
-    def test_no_hits(self):
-        """0% hit rate returns 0 for all rates."""
-        rows = [
-            {"ou_hit": False},
-            {"ou_hit": False},
-        ]
-        t, o = calculate_rates(rows)
-        assert t == 0.0
-        assert o == 0.0
+_HIT = {"ou_hit": True}
+_MISS = {"ou_hit": False}
 
-    def test_mixed_hits(self):
-        """Mixed results calculate correctly."""
-        rows = [
-            {"ou_hit": False},
-            {"ou_hit": True},
-            {"ou_hit": True},
-            {"ou_hit": False},
-        ]
-        t, o = calculate_rates(rows)
-        assert t == 0.5  # 2/4
-        assert o == 0.5  # 2/4
 
-    def test_single_row(self):
-        """Single row with one hit."""
-        rows = [{"ou_hit": False}]
-        t, o = calculate_rates(rows)
-        assert t == 0.0
-        assert o == 0.0
+class TestCalculateRates:
+    @pytest.mark.parametrize("rows,expected", [
+        ((), 0),
+        ((_HIT, _HIT), 1.0),
+        ((_MISS, _MISS), 0.0),
+        ((_MISS, _HIT, _HIT, _MISS), 0.5),
+        ((_MISS,), 0.0),
+    ], ids=["empty", "all_hits", "no_hits", "mixed_hits", "single_row"])
+    def test_rates(self, rows, expected):
+        assert calculate_rates(rows) == (expected, expected)
 
 
 # --- extract_prediction_fields ---
 
 class TestExtractPredictionFields:
-    def test_home_spread_positive_margin(self):
-        """Positive predicted_margin yields spread_pick 'home'."""
-        row = {
-            "game_id": 1,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": 5.0, "predicted_total": 215.0},
-                }
-            },
-        }
-        spread_pick, total_pick = extract_prediction_fields(row)
-        assert spread_pick == "home"
-
-    def test_away_spread_negative_margin(self):
-        """Negative predicted_margin yields spread_pick 'away'."""
-        row = {
-            "game_id": 2,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": -3.0, "predicted_total": 210.0},
-                }
-            },
-        }
-        spread_pick, total_pick = extract_prediction_fields(row)
-        assert spread_pick == "away"
-
-    def test_zero_margin_yields_away(self):
-        """Zero predicted_margin yields spread_pick 'away' (falsy)."""
-        row = {
-            "game_id": 3,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": 0, "predicted_total": 210.0},
-                }
-            },
-        }
-        spread_pick, _ = extract_prediction_fields(row)
-        assert spread_pick == "away"
-
-    def test_over_total_positive(self):
-        """Positive predicted_total yields total_pick 'over'."""
-        row = {
-            "game_id": 4,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": 2.0, "predicted_total": 220.0},
-                }
-            },
-        }
-        _, total_pick = extract_prediction_fields(row)
-        assert total_pick == "over"
-
-    def test_under_total_negative(self):
-        """Negative predicted_total yields total_pick 'under'."""
-        row = {
-            "game_id": 5,
-            "payload": {
-                "details": {
-                    "simulation": {"predicted_margin": 2.0, "predicted_total": -5.0},
-                }
-            },
-        }
-        _, total_pick = extract_prediction_fields(row)
-        assert total_pick == "under"
+    @pytest.mark.parametrize("row,index,expected", [
+        (_sim_row(1, 5.0, 215.0), 0, "home"),
+        (_sim_row(2, -3.0, 210.0), 0, "away"),
+        # Zero predicted_margin is falsy
+        (_sim_row(3, 0, 210.0), 0, "away"),
+        (_sim_row(4, 2.0, 220.0), 1, "over"),
+        (_sim_row(5, 2.0, -5.0), 1, "under"),
+    ], ids=[
+        "home_spread_positive_margin", "away_spread_negative_margin",
+        "zero_margin_yields_away", "over_total_positive", "under_total_negative",
+    ])
+    def test_picks(self, row, index, expected):
+        """Margin sign drives spread_pick; total sign drives total_pick."""
+        assert extract_prediction_fields(row)[index] == expected
 
     def test_missing_payload_defaults(self):
         """Missing payload falls back to 'away' and 'under'."""
@@ -352,13 +172,30 @@ class TestExtractPredictionFields:
 
 # --- fetch_game_result ---
 
+class _Resp:
+    """Just enough of ``requests.Response`` for fetch_game_result."""
+    __slots__ = ("status_code", "_json", "text")
+
+    def __init__(self, status_code, json=None, text=""):
+        self.status_code = status_code
+        self._json = json
+        self.text = text
+
+    def json(self):
+        return self._json
+
+
 class TestFetchGameResult:
-    @patch("app.review_engine.requests.get")
-    def test_successful_fetch(self, mock_get):
+    @pytest.fixture
+    def fake_get(self, monkeypatch):
+        """Intercept the BallDontLie session's GET for every test in the class."""
+        get = MagicMock()
+        monkeypatch.setattr("app.review_engine._get_session", lambda: MagicMock(get=get))
+        return get
+
+    def test_successful_fetch(self, fake_get):
         """Successful API call returns scores dict with spread, total, and team names."""
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {
+        fake_get.return_value = _Resp(200, {
             "data": {
                 "status": "Final",
                 "home_team_score": 105,
@@ -366,8 +203,7 @@ class TestFetchGameResult:
                 "home_team": {"full_name": "Los Angeles Lakers"},
                 "visitor_team": {"full_name": "Golden State Warriors"},
             }
-        }
-        mock_get.return_value = mock_resp
+        })
         result = fetch_game_result(12345)
         assert result["home_score"] == 105
         assert result["visitor_score"] == 98
@@ -376,39 +212,54 @@ class TestFetchGameResult:
         assert result["home_team"] == "Los Angeles Lakers"
         assert result["visitor_team"] == "Golden State Warriors"
 
-    @patch("app.review_engine.requests.get")
-    def test_game_not_final_returns_none(self, mock_get):
+    def test_game_not_final_returns_none(self, fake_get):
         """Non-final game status returns None."""
-        mock_resp = MagicMock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {
+        fake_get.return_value = _Resp(200, {
             "data": {
                 "status": "In Progress",
                 "home_team_score": 50,
                 "visitor_team_score": 48,
             }
-        }
-        mock_get.return_value = mock_resp
+        })
         result = fetch_game_result(12345)
         assert result is None
 
-    @patch("app.review_engine.requests.get")
-    def test_api_non_200_returns_none(self, mock_get):
+    def test_api_non_200_returns_none(self, fake_get):
         """Non-200 status code returns None."""
-        mock_resp = MagicMock()
-        mock_resp.status_code = 403
-        mock_resp.text = "Forbidden"
-        mock_get.return_value = mock_resp
+        fake_get.return_value = _Resp(403, text="Forbidden")
         result = fetch_game_result(12345)
         assert result is None
 
-    @patch("app.review_engine.requests.get")
-    def test_api_exception_returns_none(self, mock_get):
+    def test_api_exception_returns_none(self, fake_get):
         """Network error returns None."""
-        mock_get.side_effect = Exception("timeout")
+        fake_get.side_effect = Exception("timeout")
         result = fetch_game_result(12345)
         assert result is None
 
+    def test_session_is_reused_within_a_thread_but_not_shared(self):
+        """Each thread gets its own session and keeps reusing it."""
+        other = []
+        worker = threading.Thread(target=lambda: other.append(_get_session()))
+        worker.start()
+        worker.join()
+        assert _get_session() is _get_session()
+        assert other[0] is not _get_session()
+
+
+# --- fetch_game_results ---
+
+class TestFetchGameResults:
+    @patch("app.review_engine.fetch_game_result")
+    def test_maps_each_game_id_to_its_result(self, mock_fetch):
+        """Each distinct game_id is fetched once and keyed to its result."""
+        mock_fetch.side_effect = lambda gid: {"home_score": gid} if gid != 2 else None
+        results = fetch_game_results([1, 2, 3, 1])
+        assert results == {1: {"home_score": 1}, 2: None, 3: {"home_score": 3}}
+        assert mock_fetch.call_count == 3
+
+    def test_empty_ids(self):
+        assert fetch_game_results([]) == {}
+
 
 # --- run_review Telegram notification ---
 
@@ -465,51 +316,46 @@ class TestRunReviewTelegram:
 # --- calc_spread_hit ---
 
 class TestCalcSpreadHit:
-    def test_home_covers_with_negative_spread(self):
-        """Home favored by 4.5 and wins by 10 → hit."""
-        assert calc_spread_hit("home", "LAL", "GSW", 113, 103, -4.5) is True
-
-    def test_home_does_not_cover(self):
-        """Home favored by 4.5 but wins by only 3 → miss."""
-        assert calc_spread_hit("home", "LAL", "GSW", 106, 103, -4.5) is False
-
-    def test_away_covers(self):
-        """Away gets +4.5, home wins by only 3 → away covers."""
-        assert calc_spread_hit("away", "LAL", "GSW", 106, 103, -4.5) is True
-
-    def test_away_does_not_cover(self):
-        """Away gets +4.5 but home wins by 10 → away miss."""
-        assert calc_spread_hit("away", "LAL", "GSW", 113, 103, -4.5) is False
-
-    def test_unknown_pick_returns_false(self):
-        assert calc_spread_hit("unknown", "LAL", "GSW", 110, 100, 0) is False
-
-    def test_exact_zero_adjusted_margin_home(self):
-        """Adjusted margin exactly 0 is not a hit for home (push)."""
-        assert calc_spread_hit("home", "LAL", "GSW", 105, 100, -5) is False
+    @pytest.mark.parametrize("pick,home,visitor,line,expected", [
+        # Home favored by 4.5 and wins by 10 → hit
+        ("home", 113, 103, -4.5, True),
+        # Home favored by 4.5 but wins by only 3 → miss
+        ("home", 106, 103, -4.5, False),
+        # Away gets +4.5, home wins by only 3 → away covers
+        ("away", 106, 103, -4.5, True),
+        # Away gets +4.5 but home wins by 10 → away miss
+        ("away", 113, 103, -4.5, False),
+        ("unknown", 110, 100, 0, False),
+        # Adjusted margin exactly 0 is not a hit for home (push)
+        ("home", 105, 100, -5, False),
+        (None, 110, 100, None, False),
+    ], ids=[
+        "home_covers_with_negative_spread", "home_does_not_cover", "away_covers",
+        "away_does_not_cover", "unknown_pick", "exact_zero_adjusted_margin_home",
+        "unknown_pick_without_line",
+    ])
+    def test_calc_spread_hit(self, pick, home, visitor, line, expected):
+        assert calc_spread_hit(pick, "LAL", "GSW", home, visitor, line) is expected
 
 
 # --- calc_total_hit ---
 
 class TestCalcTotalHit:
-    def test_over_hits(self):
-        assert calc_total_hit("over", 115, 110, 220) is True
-
-    def test_over_misses(self):
-        assert calc_total_hit("over", 100, 105, 220) is False
-
-    def test_under_hits(self):
-        assert calc_total_hit("under", 100, 105, 220) is True
-
-    def test_under_misses(self):
-        assert calc_total_hit("under", 115, 110, 220) is False
-
-    def test_unknown_pick_returns_false(self):
-        assert calc_total_hit("", 110, 100, 220) is False
-
-    def test_exact_total_equals_line(self):
-        """Total exactly equals line — not a hit for over (push)."""
-        assert calc_total_hit("over", 110, 110, 220) is False
+    @pytest.mark.parametrize("pick,home,visitor,line,expected", [
+        ("over", 115, 110, 220, True),
+        ("over", 100, 105, 220, False),
+        ("under", 100, 105, 220, True),
+        ("under", 115, 110, 220, False),
+        ("", 110, 100, 220, False),
+        # Total exactly equals line — not a hit for over (push)
+        ("over", 110, 110, 220, False),
+        (None, 110, 100, None, False),
+    ], ids=[
+        "over_hits", "over_misses", "under_hits", "under_misses",
+        "unknown_pick", "exact_total_equals_line", "unknown_pick_without_line",
+    ])
+    def test_calc_total_hit(self, pick, home, visitor, line, expected):
+        assert calc_total_hit(pick, home, visitor, line) is expected
 
 
 # --- zh_hit ---
@@ -574,12 +420,42 @@ class TestBuildReviewMessage:
 
 # --- build_review_summary ---
 
+class _FakeResult:
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+
+class _FakeQuery:
+    """Minimal stand-in for ``client.table(...).select(...)``."""
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def execute(self):
+        return _FakeResult(self._rows)
+
+
+class _FakeClient:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def table(self, name):
+        return _FakeQuery(self._rows)
+
+
+def _days_ago(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+
 class TestBuildReviewSummary:
     def test_empty_data_returns_no_data_message(self):
         """No review rows returns the placeholder string."""
-        mock_client = MagicMock()
-        mock_client.table.return_value.select.return_value.execute.return_value = MagicMock(data=[])
-        result = build_review_summary(mock_client)
+        result = build_review_summary(_FakeClient([]))
         assert result == "暂无复盘数据"
 
     def test_summary_with_data(self):
@@ -588,9 +464,7 @@ class TestBuildReviewSummary:
             {"ou_hit": False, "reviewed_at": "2026-02-20T10:00:00+00:00"},
             {"ou_hit": True, "reviewed_at": "2026-02-21T10:00:00+00:00"},
         ]
-        mock_client = MagicMock()
-        mock_client.table.return_value.select.return_value.execute.return_value = MagicMock(data=rows)
-        result = build_review_summary(mock_client)
+        result = build_review_summary(_FakeClient(rows))
         assert "NBA复盘报告" in result
         assert "50.0%" in result
         assert "复盘场次：2" in result
@@ -600,11 +474,10 @@ class TestBuildReviewSummary:
     def test_summary_last30_section(self):
         """Recent rows appear in 30-day rolling section."""
         rows = [
-            {"ou_hit": True, "reviewed_at": "2026-02-20T10:00:00+00:00"},
+            {"ou_hit": True, "reviewed_at": _days_ago(1)},
+            {"ou_hit": False, "reviewed_at": _days_ago(45)},
         ]
-        mock_client = MagicMock()
-        mock_client.table.return_value.select.return_value.execute.return_value = MagicMock(data=rows)
-        result = build_review_summary(mock_client)
+        result = build_review_summary(_FakeClient(rows))
         assert "近30天滚动表现" in result
         assert "样本数：1" in result
 
@@ -1,224 +1,367 @@
 """Tests for supabase_client module."""
 from __future__ import annotations
 
-import os
+import gzip
+import sys
 from unittest import mock
 
+import httpx
 import pytest
 
-# Ensure Supabase credentials are NOT set during import
-os.environ.pop("SUPABASE_URL", None)
-os.environ.pop("SUPABASE_KEY", None)
-
 from app import supabase_client
 
 
-@pytest.fixture(autouse=True)
-def _reset_client():
-    """Reset module-level state between tests."""
-    supabase_client._client = None
-    supabase_client._available = None
-    yield
-    supabase_client._client = None
-    supabase_client._available = None
+pytestmark = pytest.mark.usefixtures("reset_supabase_client")
+
+
+def _set_credentials(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://x.supabase.co")
+    monkeypatch.setenv("SUPABASE_KEY", "key123")
 
 
 # --- _get_client ---
 
-def test_get_client_no_credentials():
+def test_get_client_no_credentials(monkeypatch):
     """Without env vars, _get_client returns None."""
-    with mock.patch.dict(os.environ, {}, clear=True):
-        assert supabase_client._get_client() is None
-        assert supabase_client._available is False
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_KEY", raising=False)
+    assert supabase_client._get_client() is None
+    assert supabase_client._available is False
 
 
-def test_get_client_with_credentials():
+def test_get_client_with_credentials(monkeypatch):
     """With env vars, _get_client initializes the Supabase client."""
     fake_client = mock.MagicMock()
-    with mock.patch.dict(os.environ, {"SUPABASE_URL": "https://x.supabase.co", "SUPABASE_KEY": "key123"}):
-        with mock.patch.dict(
-            "sys.modules",
-            {"supabase": mock.MagicMock(create_client=mock.MagicMock(return_value=fake_client))},
-        ):
-            client = supabase_client._get_client()
+    monkeypatch.setitem(
+        sys.modules, "supabase", mock.MagicMock(create_client=mock.MagicMock(return_value=fake_client))
+    )
+    _set_credentials(monkeypatch)
+    client = supabase_client._get_client()
     assert client is fake_client
     assert supabase_client._available is True
 
 
-# --- _ensure_tables ---
+def test_get_client_creates_one_client_under_concurrency(monkeypatch):
+    """Concurrent first calls share a single client instead of racing to build several."""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
 
-def test_ensure_tables_checks_all_four():
-    """_ensure_tables checks predictions, simulation_logs, training_logs, review_results."""
     fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._ensure_tables()
-    tables_checked = [call[0][0] for call in fake_client.table.call_args_list]
-    assert "predictions" in tables_checked
-    assert "simulation_logs" in tables_checked
-    assert "training_logs" in tables_checked
-    assert "review_results" in tables_checked
 
+    def slow_create(*args, **kwargs):
+        time.sleep(0.05)
+        return fake_client
 
-# --- save_prediction ---
+    create = mock.MagicMock(side_effect=slow_create)
+    barrier = threading.Barrier(8)
 
-def test_save_prediction_skips_when_not_configured():
-    """save_prediction is a no-op without credentials."""
-    supabase_client._available = False
-    supabase_client.save_prediction({"game_id": 1})  # should not raise
+    def first_call():
+        barrier.wait()
+        return supabase_client._get_client()
 
+    monkeypatch.setitem(sys.modules, "supabase", mock.MagicMock(create_client=create))
+    _set_credentials(monkeypatch)
+    with mock.patch.object(supabase_client, "_build_http_client"):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            clients = list(pool.map(lambda _: first_call(), range(8)))
 
-def test_save_prediction_does_not_raise_on_failure():
-    """save_prediction swallows exceptions so the pipeline never crashes."""
-    fake_client = mock.MagicMock()
-    fake_client.table.return_value.insert.return_value.execute.side_effect = RuntimeError("write failed")
-    supabase_client._client = fake_client
-    supabase_client._available = True
-    supabase_client.save_prediction({"game_id": 1})  # should not raise
+    assert all(c is fake_client for c in clients)
+    create.assert_called_once()
 
 
-def test_save_prediction_uses_payload_jsonb():
-    """save_prediction stores all data inside game_id + payload JSONB."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
+def test_build_http_client_configures_pool(monkeypatch):
+    """The shared HTTP client retries connects and keeps connections alive."""
+    transport = mock.MagicMock()
+    limits = mock.MagicMock()
+    client = mock.MagicMock()
+    monkeypatch.setattr("httpx.HTTPTransport", transport)
+    monkeypatch.setattr("httpx.Limits", limits)
+    monkeypatch.setattr("httpx.Client", client)
+    monkeypatch.setattr("app.supabase_client.atexit", mock.MagicMock())
 
-    supabase_client.save_prediction({
-        "game_id": 42,
-        "game_date": "2025-01-15",
-        "home_team": "Lakers",
-        "away_team": "Celtics",
-        "spread_line": -3.5,
-        "total_line": 220.5,
-        "spread_pick": "home_cover",
-        "total_pick": "over",
-        "spread_confidence": 65.0,
-        "total_confidence": 58.0,
-        "model_version": "v2",
-        "simulation_runs": 10000,
-    })
+    session = supabase_client._build_http_client()
 
-    inserted = fake_client.table.return_value.insert.call_args[0][0]
-    assert inserted["game_id"] == 42
-    assert "payload" in inserted
-    assert len(inserted) == 2  # only 'game_id' and 'payload' at top level
-    payload = inserted["payload"]
-    assert payload["game_id"] == 42
-    assert payload["game_date"] == "2025-01-15"
-    assert payload["spread_line"] == -3.5
-    assert payload["total_line"] == 220.5
-    assert payload["spread_confidence"] == 65.0
-    assert payload["total_confidence"] == 58.0
-    assert payload["model_version"] == "v2"
-    assert payload["simulation_runs"] == 10000
-    assert "created_at" in payload
+    limits.assert_called_once_with(
+        max_keepalive_connections=20,
+        max_connections=40,
+        keepalive_expiry=supabase_client._KEEPALIVE_EXPIRY,
+    )
+    assert transport.call_args.kwargs["retries"] == supabase_client._CONNECT_RETRIES
+    assert transport.call_args.kwargs["limits"] is limits.return_value
+    client.assert_called_once_with(transport=transport.return_value, timeout=30)
+    assert session is client.return_value
 
 
-# --- save_simulation_log ---
+# --- _ensure_tables ---
 
-def test_save_simulation_log_does_not_raise_on_failure():
-    """save_simulation_log swallows exceptions so the pipeline never crashes."""
+def test_ensure_tables_checks_all_four():
+    """_ensure_tables checks predictions, simulation_logs, training_logs, review_results."""
     fake_client = mock.MagicMock()
-    fake_client.table.return_value.insert.return_value.execute.side_effect = RuntimeError("fail")
     supabase_client._client = fake_client
-    supabase_client._available = True
-    supabase_client.save_simulation_log({"game_id": 1})  # should not raise
-
-
-def test_save_simulation_log_skips_when_not_configured():
-    """save_simulation_log is a no-op without credentials."""
+    supabase_client._ensure_tables()
+    tables_checked = {call.args[0] for call in fake_client.table.call_args_list}
+    assert tables_checked >= {"predictions", "simulation_logs", "training_logs", "review_results"}
+
+
+# --- save_prediction / save_simulation_log / save_training_log ---
+
+_SAVE_LOG_CASES = [
+    pytest.param(
+        supabase_client.save_prediction,
+        {
+            "game_id": 42,
+            "game_date": "2025-01-15",
+            "home_team": "Lakers",
+            "away_team": "Celtics",
+            "spread_line": -3.5,
+            "total_line": 220.5,
+            "spread_pick": "home_cover",
+            "total_pick": "over",
+            "spread_confidence": 65.0,
+            "total_confidence": 58.0,
+            "model_version": "v2",
+            "simulation_runs": 10000,
+        },
+        {"game_id", "payload"},
+        "created_at",
+        id="prediction",
+    ),
+    pytest.param(
+        supabase_client.save_simulation_log,
+        {
+            "game_id": 42,
+            "model_version": "v2",
+            "simulation_runs": 10000,
+            "spread_cover_probability": 0.65,
+            "over_probability": 0.58,
+            "expected_home_score": 112.5,
+            "expected_visitor_score": 108.3,
+        },
+        {"game_id", "payload"},
+        "timestamp",
+        id="simulation_log",
+    ),
+    pytest.param(
+        supabase_client.save_training_log,
+        {
+            "model_version": "v2",
+            "feature_count": 50,
+            "algorithm": "xgboost",
+            "home_mae": 4.5,
+        },
+        {"payload"},
+        "timestamp",
+        id="training_log",
+    ),
+]
+_SAVE_LOG_FNS = [
+    pytest.param(supabase_client.save_prediction, id="prediction"),
+    pytest.param(supabase_client.save_simulation_log, id="simulation_log"),
+    pytest.param(supabase_client.save_training_log, id="training_log"),
+]
+
+
+@pytest.mark.parametrize("save_fn", _SAVE_LOG_FNS)
+def test_save_log_skips_when_not_configured(save_fn):
+    """The save_* helpers are no-ops without credentials."""
     supabase_client._available = False
-    supabase_client.save_simulation_log({"game_id": 1})  # should not raise
+    save_fn({"game_id": 1, "model_version": "v1"})  # should not raise
 
 
-def test_save_simulation_log_uses_payload_jsonb():
-    """save_simulation_log stores all data inside game_id + payload JSONB."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
+@pytest.mark.parametrize("save_fn", _SAVE_LOG_FNS)
+@pytest.mark.usefixtures("failing_supabase_client")
+def test_save_log_does_not_raise_on_failure(save_fn):
+    """The save_* helpers swallow exceptions so the pipeline never crashes."""
+    save_fn({"game_id": 1, "model_version": "v1"})  # should not raise
 
-    supabase_client.save_simulation_log({
-        "game_id": 42,
-        "model_version": "v2",
-        "simulation_runs": 10000,
-        "spread_cover_probability": 0.65,
-        "over_probability": 0.58,
-        "expected_home_score": 112.5,
-        "expected_visitor_score": 108.3,
-    })
 
-    inserted = fake_client.table.return_value.insert.call_args[0][0]
-    assert inserted["game_id"] == 42
-    assert "payload" in inserted
-    assert len(inserted) == 2  # only 'game_id' and 'payload' at top level
+@pytest.mark.parametrize("save_fn,row,top_level,stamp_key", _SAVE_LOG_CASES)
+def test_save_log_uses_payload_jsonb(save_fn, row, top_level, stamp_key, fake_supabase_client):
+    """The save_* helpers store all data inside the payload JSONB column."""
+    save_fn(row)
+
+    inserted = fake_supabase_client.table.return_value.insert.call_args[0][0]
+    assert set(inserted) == top_level
+    if "game_id" in top_level:
+        assert inserted["game_id"] == row["game_id"]
     payload = inserted["payload"]
-    assert payload["game_id"] == 42
-    assert payload["model_version"] == "v2"
-    assert payload["simulation_runs"] == 10000
-    assert payload["spread_cover_probability"] == 0.65
-    assert payload["over_probability"] == 0.58
-    assert payload["expected_home_score"] == 112.5
-    assert payload["expected_visitor_score"] == 108.3
-    assert "timestamp" in payload
+    assert payload.items() >= row.items()
+    assert stamp_key in payload
+
+
+def _postgrest_over(*outcomes):
+    """Real PostgREST client whose HTTP calls return/raise *outcomes* in order."""
+    from postgrest import SyncPostgrestClient
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        outcome = outcomes[len(requests) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    base_url = "https://x.supabase.co/rest/v1"
+    http = httpx.Client(transport=httpx.MockTransport(handler), base_url=base_url)
+    return SyncPostgrestClient(base_url, http_client=http), requests
+
+
+def _pgrst_error(status, code, message):
+    return httpx.Response(status, json={"code": code, "message": message, "details": None, "hint": None})
+
+
+def _created():
+    return httpx.Response(201)
+
+
+@pytest.mark.parametrize("first_failure", [
+    pytest.param(_pgrst_error(503, "PGRST001", "Database client error"), id="pgrst-connection"),
+    pytest.param(_pgrst_error(504, "PGRST003", "Timed out acquiring connection"), id="pgrst-pool"),
+    pytest.param(httpx.Response(502, text="<html>Bad Gateway</html>"), id="gateway-502"),
+    pytest.param(httpx.ConnectError("refused"), id="connect-error"),
+])
+def test_save_prediction_retries_when_nothing_was_written(first_failure, monkeypatch):
+    """Failures that cannot have committed the row are retried with backoff."""
+    client, requests = _postgrest_over(first_failure, _created())
+    monkeypatch.setattr(supabase_client, "_client", client)
+    monkeypatch.setattr(supabase_client, "_available", True)
+
+    with mock.patch.object(supabase_client.time, "sleep") as sleep:
+        supabase_client.save_prediction({"game_id": 1})
+    assert len(requests) == 2
+    sleep.assert_called_once()
+
+
+@pytest.mark.parametrize("failure", [
+    pytest.param(_pgrst_error(404, "42P01", "relation does not exist"), id="permanent"),
+    pytest.param(httpx.Response(504, text="Gateway Timeout"), id="gateway-504"),
+    pytest.param(httpx.ReadTimeout("slow"), id="read-timeout"),
+])
+def test_save_prediction_does_not_retry_possibly_committed_or_permanent_errors(failure, monkeypatch):
+    """Permanent errors, and failures after the insert may have landed, are not retried."""
+    client, requests = _postgrest_over(failure, _created())
+    monkeypatch.setattr(supabase_client, "_client", client)
+    monkeypatch.setattr(supabase_client, "_available", True)
+
+    with mock.patch.object(supabase_client.time, "sleep") as sleep:
+        supabase_client.save_prediction({"game_id": 1})  # should not raise
+    assert len(requests) == 1
+    sleep.assert_not_called()
+
+
+# --- batched_writes ---
 
+def test_batched_writes_sends_one_insert_per_table(fake_supabase_client):
+    """Inside batched_writes, rows are buffered and flushed in bulk on exit."""
+    with supabase_client.batched_writes():
+        for game_id in (1, 2, 3):
+            supabase_client.save_prediction({"game_id": game_id})
+            supabase_client.save_simulation_log({"game_id": game_id})
+        fake_supabase_client.table.return_value.insert.assert_not_called()
 
-# --- save_training_log ---
+    insert = fake_supabase_client.table.return_value.insert
+    assert insert.call_count == 2
+    batches = {len(call[0][0]) for call in insert.call_args_list}
+    assert batches == {3}
+    assert not supabase_client._buffers
 
-def test_save_training_log_does_not_raise_on_failure():
-    """save_training_log swallows exceptions so the pipeline never crashes."""
-    fake_client = mock.MagicMock()
-    fake_client.table.return_value.insert.return_value.execute.side_effect = RuntimeError("fail")
-    supabase_client._client = fake_client
-    supabase_client._available = True
-    supabase_client.save_training_log({"model_version": "v1"})  # should not raise
 
+def test_batched_writes_flushes_when_batch_is_full(fake_supabase_client):
+    """A table reaching _MAX_BATCH rows is written before the block ends."""
+    with mock.patch.object(supabase_client, "_MAX_BATCH", 2):
+        with supabase_client.batched_writes():
+            supabase_client.save_prediction({"game_id": 1})
+            supabase_client.save_prediction({"game_id": 2})
+            assert fake_supabase_client.table.return_value.insert.call_count == 1
+            supabase_client.save_prediction({"game_id": 3})
+    assert fake_supabase_client.table.return_value.insert.call_count == 2
 
-def test_save_training_log_skips_when_not_configured():
-    """save_training_log is a no-op without credentials."""
-    supabase_client._available = False
-    supabase_client.save_training_log({"model_version": "v1"})  # should not raise
 
+def test_batched_writes_flushes_when_oldest_row_is_stale(fake_supabase_client):
+    """Rows queued longer than _MAX_BATCH_AGE go out on the next append."""
+    clock = iter([100.0, 100.1, 100.6, 100.7])
 
-def test_save_training_log_uses_payload_jsonb():
-    """save_training_log stores all data inside a 'payload' JSONB column."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
+    with mock.patch.object(supabase_client, "_MAX_BATCH_AGE", 0.5):
+        with mock.patch.object(supabase_client.time, "monotonic", lambda: next(clock)):
+            with supabase_client.batched_writes():
+                supabase_client.save_simulation_log({"game_id": 1})
+                supabase_client.save_simulation_log({"game_id": 2})
+                fake_supabase_client.table.return_value.insert.assert_not_called()
+                supabase_client.save_simulation_log({"game_id": 3})
+                assert len(fake_supabase_client.table.return_value.insert.call_args[0][0]) == 3
+                supabase_client.save_simulation_log({"game_id": 4})
+    assert fake_supabase_client.table.return_value.insert.call_count == 2
+    assert not supabase_client._buffered_since
+
+
+def test_batched_writes_only_buffers_the_opening_thread(fake_supabase_client):
+    """A save from another thread while a block is open is written immediately."""
+    import threading
+
+    with supabase_client.batched_writes():
+        supabase_client.save_prediction({"game_id": 1})
+        worker = threading.Thread(target=supabase_client.save_training_log, args=({"model_version": "v1"},))
+        worker.start()
+        worker.join()
+        insert = fake_supabase_client.table.return_value.insert
+        assert insert.call_count == 1
+        assert "payload" in insert.call_args.args[0]  # the single training row, not a batch
+    assert insert.call_count == 2
+
+
+def test_batched_writes_keeps_batching_across_slow_games(fake_supabase_client):
+    """Seconds per game still add up to a few bulk inserts, not one per row."""
+    clock = iter(range(0, 80, 2))  # one save every two seconds
+
+    with mock.patch.object(supabase_client.time, "monotonic", lambda: next(clock)):
+        with supabase_client.batched_writes():
+            for game_id in range(40):
+                supabase_client.save_prediction({"game_id": game_id})
+
+    insert = fake_supabase_client.table.return_value.insert
+    assert [len(call.args[0]) for call in insert.call_args_list] == [16, 16, 8]
+
+
+@pytest.mark.usefixtures("failing_supabase_client")
+def test_batched_writes_does_not_raise_on_failure():
+    """A failed bulk insert is logged and the buffer is discarded."""
+    with supabase_client.batched_writes():
+        supabase_client.save_training_log({"model_version": "v1"})
+    assert not supabase_client._buffers
+
+
+def test_save_predictions_sends_one_insert(fake_supabase_client):
+    """save_predictions writes every row in a single multi-row INSERT."""
+    supabase_client.save_predictions({"game_id": gid} for gid in range(5))
+
+    insert = fake_supabase_client.table.return_value.insert
+    insert.assert_called_once()
+    rows = insert.call_args[0][0]
+    assert [r["game_id"] for r in rows] == list(range(5))
+    assert all(r["payload"]["is_final_prediction"] is True for r in rows)
 
-    supabase_client.save_training_log({
-        "model_version": "v2",
-        "feature_count": 50,
-        "algorithm": "xgboost",
-        "home_mae": 4.5,
-    })
 
-    inserted = fake_client.table.return_value.insert.call_args[0][0]
-    assert "payload" in inserted
-    assert len(inserted) == 1  # only 'payload' key at top level
-    payload = inserted["payload"]
-    assert payload["model_version"] == "v2"
-    assert payload["feature_count"] == 50
-    assert payload["algorithm"] == "xgboost"
-    assert payload["home_mae"] == 4.5
-    assert "timestamp" in payload
+def test_save_simulation_logs_chunks_at_max_batch(fake_supabase_client):
+    """Bulk saves split into INSERTs of at most _MAX_BATCH rows."""
+    with mock.patch.object(supabase_client, "_MAX_BATCH", 2):
+        supabase_client.save_simulation_logs([{"game_id": gid} for gid in range(5)])
+
+    insert = fake_supabase_client.table.return_value.insert
+    assert [len(call[0][0]) for call in insert.call_args_list] == [2, 2, 1]
 
 
 # --- save_review_result ---
 
+@pytest.mark.usefixtures("failing_supabase_client")
 def test_save_review_result_does_not_raise_on_failure():
     """save_review_result swallows exceptions so the workflow never crashes."""
-    fake_client = mock.MagicMock()
-    fake_client.table.return_value.upsert.return_value.execute.side_effect = RuntimeError("fail")
-    supabase_client._client = fake_client
-    supabase_client._available = True
     supabase_client.save_review_result({"game_id": 1})  # should not raise
 
 
-def test_save_review_result_includes_fields():
+def test_save_review_result_includes_fields(fake_supabase_client):
     """save_review_result record contains expected fields written directly."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
-
     supabase_client.save_review_result({
         "game_id": 42,
         "game_date": "2025-01-15",
@@ -232,7 +375,7 @@ def test_save_review_result_includes_fields():
         "final_visitor_score": 108,
     })
 
-    upserted = fake_client.table.return_value.upsert.call_args[0][0]
+    upserted = fake_supabase_client.table.return_value.upsert.call_args[0][0]
     assert upserted["game_id"] == 42
     assert upserted["game_date"] == "2025-01-15"
     assert upserted["spread_correct"] is True
@@ -242,7 +385,7 @@ def test_save_review_result_includes_fields():
     assert upserted["away_team"] == "Celtics"
     assert "reviewed_at" in upserted
     # Verify on_conflict is set to game_id
-    assert fake_client.table.return_value.upsert.call_args[1]["on_conflict"] == "game_id"
+    assert fake_supabase_client.table.return_value.upsert.call_args[1]["on_conflict"] == "game_id"
 
 
 def test_save_review_result_skips_when_not_configured():
@@ -251,12 +394,8 @@ def test_save_review_result_skips_when_not_configured():
     supabase_client.save_review_result({"game_id": 1})  # should not raise
 
 
-def test_save_review_result_writes_all_fields():
+def test_save_review_result_writes_all_fields(fake_supabase_client):
     """save_review_result writes all fields directly without filtering."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
-
     supabase_client.save_review_result({
         "game_id": 42,
         "home_team": "Lakers",
@@ -265,7 +404,7 @@ def test_save_review_result_writes_all_fields():
         "extra_field": "included",
     })
 
-    upserted = fake_client.table.return_value.upsert.call_args[0][0]
+    upserted = fake_supabase_client.table.return_value.upsert.call_args[0][0]
     assert upserted["game_id"] == 42
     assert upserted["home_team"] == "Lakers"
     assert upserted["away_team"] == "Celtics"
@@ -282,36 +421,64 @@ def test_upload_models_skips_when_not_configured():
     assert supabase_client.upload_models_to_storage("/tmp/models") is False
 
 
-def test_upload_models_uploads_all_files(tmp_path):
+def test_upload_models_uploads_all_files(tmp_path, fake_supabase_client):
     """upload_models_to_storage uploads each model file to the bucket."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
-
     for fname in supabase_client._MODEL_STORAGE_FILES:
-        (tmp_path / fname).write_bytes(b"fake-model-data")
+        (tmp_path / fname).touch()
 
     result = supabase_client.upload_models_to_storage(tmp_path)
     assert result is True
 
-    upload_calls = fake_client.storage.from_.return_value.upload.call_args_list
+    upload_calls = fake_supabase_client.storage.from_.return_value.upload.call_args_list
     uploaded_names = [call[0][0] for call in upload_calls]
     for fname in supabase_client._MODEL_STORAGE_FILES:
-        assert fname in uploaded_names
+        assert supabase_client._storage_name(fname) in uploaded_names
 
 
-def test_upload_models_handles_missing_files(tmp_path):
+def test_upload_models_handles_missing_files(tmp_path, fake_supabase_client):
     """upload_models_to_storage skips files that don't exist locally."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
-
     # Only create one file
-    (tmp_path / "home_model.pkl").write_bytes(b"data")
+    (tmp_path / "home_model.pkl").touch()
 
     result = supabase_client.upload_models_to_storage(tmp_path)
     assert result is True
-    assert fake_client.storage.from_.return_value.upload.call_count == 1
+    assert fake_supabase_client.storage.from_.return_value.upload.call_count == 1
+
+
+def test_upload_models_upserts_without_remove(tmp_path, fake_supabase_client):
+    """Uploads overwrite in place via upsert instead of remove + upload."""
+    (tmp_path / "home_model.pkl").touch()
+
+    supabase_client.upload_models_to_storage(tmp_path)
+    bucket = fake_supabase_client.storage.from_.return_value
+    args = bucket.upload.call_args[0]
+    assert args[0] == "home_model.pkl.gz"
+    assert args[2] == {"upsert": "true", "content-type": "application/gzip"}
+    bucket.remove.assert_not_called()
+
+
+def test_upload_models_gzips_pickles(tmp_path, fake_supabase_client):
+    """Pickles are uploaded gzip-compressed; JSON files are sent as-is."""
+    uploaded = {}
+    fake_supabase_client.storage.from_.return_value.upload.side_effect = (
+        lambda name, fh, options: uploaded.__setitem__(name, fh.read())
+    )
+
+    (tmp_path / "home_model.pkl").write_bytes(b"pickle-bytes" * 100)
+    (tmp_path / "model_version.json").write_bytes(b'{"version": "v1"}')
+
+    assert supabase_client.upload_models_to_storage(tmp_path) is True
+    assert gzip.decompress(uploaded["home_model.pkl.gz"]) == b"pickle-bytes" * 100
+    assert uploaded["model_version.json"] == b'{"version": "v1"}'
+
+
+def test_upload_models_returns_false_when_upload_fails(tmp_path, fake_supabase_client):
+    """A failed upload is reported as an unsuccessful sync."""
+    fake_supabase_client.storage.from_.return_value.upload.side_effect = RuntimeError("boom")
+
+    (tmp_path / "home_model.pkl").touch()
+
+    assert supabase_client.upload_models_to_storage(tmp_path) is False
 
 
 # --- download_models_from_storage ---
@@ -322,13 +489,11 @@ def test_download_models_skips_when_not_configured():
     assert supabase_client.download_models_from_storage("/tmp/models") is False
 
 
-def test_download_models_downloads_all_files(tmp_path):
+def test_download_models_downloads_all_files(tmp_path, fake_supabase_client):
     """download_models_from_storage writes files from the bucket to disk."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
-
-    fake_client.storage.from_.return_value.download.return_value = b"model-bytes"
+    fake_supabase_client.storage.from_.return_value.download.side_effect = (
+        lambda name: gzip.compress(b"model-bytes") if name.endswith(".gz") else b"model-bytes"
+    )
 
     result = supabase_client.download_models_from_storage(tmp_path)
     assert result is True
@@ -338,14 +503,47 @@ def test_download_models_downloads_all_files(tmp_path):
         assert (tmp_path / fname).read_bytes() == b"model-bytes"
 
 
-def test_download_models_returns_false_when_required_missing(tmp_path):
-    """download_models_from_storage returns False if required models fail to download."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
+def test_download_models_falls_back_to_uncompressed(tmp_path, fake_supabase_client):
+    """Objects uploaded before compression are still restored."""
+    from storage3.exceptions import StorageApiError
+
+    def fake_download(name):
+        if name.endswith(".gz"):
+            raise StorageApiError("Object not found", "not_found", 404)
+        return b"legacy-bytes"
+
+    fake_supabase_client.storage.from_.return_value.download.side_effect = fake_download
+
+    assert supabase_client.download_models_from_storage(tmp_path) is True
+    assert (tmp_path / "home_model.pkl").read_bytes() == b"legacy-bytes"
+
+
+def test_download_models_does_not_fall_back_on_transient_errors(tmp_path, fake_supabase_client):
+    """A 5xx on the compressed object fails the file instead of restoring a legacy copy."""
+    from storage3.exceptions import StorageApiError
+
+    download = fake_supabase_client.storage.from_.return_value.download
+    download.side_effect = StorageApiError("Service Unavailable", "InternalError", 503)
+
+    assert supabase_client.download_models_from_storage(tmp_path) is False
+    requested = {call.args[0] for call in download.call_args_list}
+    assert "home_model.pkl" not in requested
+    assert not (tmp_path / "home_model.pkl").exists()
+
+
+def test_download_models_leaves_no_partial_file(tmp_path, fake_supabase_client):
+    """A corrupt compressed object does not leave a truncated model on disk."""
+    fake_supabase_client.storage.from_.return_value.download.return_value = gzip.compress(b"x" * 1000)[:-8]
+
+    assert supabase_client.download_models_from_storage(tmp_path) is False
+    assert not (tmp_path / "home_model.pkl").exists()
+    assert not list(tmp_path.glob("*.part"))
 
+
+def test_download_models_returns_false_when_required_missing(tmp_path, fake_supabase_client):
+    """download_models_from_storage returns False if required models fail to download."""
     # All downloads fail
-    fake_client.storage.from_.return_value.download.side_effect = RuntimeError("not found")
+    fake_supabase_client.storage.from_.return_value.download.side_effect = RuntimeError("not found")
 
     result = supabase_client.download_models_from_storage(tmp_path)
     assert result is False
@@ -353,33 +551,25 @@ def test_download_models_returns_false_when_required_missing(tmp_path):
 
 # --- adaptive_upsert ---
 
-def test_adaptive_upsert_writes_all_fields():
+def test_adaptive_upsert_writes_all_fields(fake_supabase_client):
     """adaptive_upsert writes the full record without filtering."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
-
     supabase_client.adaptive_upsert("test_table", {"game_id": 1, "score": 100, "extra": "included"})
 
-    upserted = fake_client.table.return_value.upsert.call_args[0][0]
+    upserted = fake_supabase_client.table.return_value.upsert.call_args[0][0]
     assert upserted == {"game_id": 1, "score": 100, "extra": "included"}
 
 
-def test_adaptive_upsert_retries_on_failure():
+def test_adaptive_upsert_retries_on_failure(fake_supabase_client):
     """adaptive_upsert retries once when the first upsert fails."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
-
     # First call fails, second succeeds
-    fake_client.table.return_value.upsert.return_value.execute.side_effect = [
+    fake_supabase_client.table.return_value.upsert.return_value.execute.side_effect = [
         RuntimeError("transient"),
         mock.MagicMock(),
     ]
 
     supabase_client.adaptive_upsert("test_table", {"game_id": 1})
 
-    assert fake_client.table.return_value.upsert.return_value.execute.call_count == 2
+    assert fake_supabase_client.table.return_value.upsert.return_value.execute.call_count == 2
 
 
 def test_adaptive_upsert_skips_when_not_configured():
@@ -388,12 +578,8 @@ def test_adaptive_upsert_skips_when_not_configured():
     supabase_client.adaptive_upsert("test_table", {"game_id": 1})  # should not raise
 
 
-def test_adaptive_upsert_custom_conflict():
+def test_adaptive_upsert_custom_conflict(fake_supabase_client):
     """adaptive_upsert passes through the conflict parameter."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
-
     supabase_client.adaptive_upsert("test_table", {"id": 1, "value": "x"}, conflict="id")
 
-    assert fake_client.table.return_value.upsert.call_args[1]["on_conflict"] == "id"
+    assert fake_supabase_client.table.return_value.upsert.call_args[1]["on_conflict"] == "id"
@@ -1,9 +1,16 @@
 """Tests for telegram_text and ProgressTracker Chinese output."""
 from __future__ import annotations
 
+from unittest import mock
+
 from app.telegram_text import TEXT
 from app.telegram_bot import ProgressTracker
 
+_ENGLISH_LABELS = frozenset({
+    "System Starting", "Fetching Games Data", "Loading Models",
+    "Running Monte Carlo Simulation", "Saving Results", "Completed",
+})
+
 
 # ---------- telegram_text: TEXT dict ----------
 
@@ -25,10 +32,8 @@ def test_text_values_are_chinese():
 
 def test_progress_tracker_stages_use_chinese():
     """ProgressTracker.STAGES labels are Chinese, not English."""
-    english_labels = {"System Starting", "Fetching Games Data", "Loading Models",
-                      "Running Monte Carlo Simulation", "Saving Results", "Completed"}
-    for _, label in ProgressTracker.STAGES:
-        assert label not in english_labels, f"English label '{label}' still in STAGES"
+    labels = {label for _, label in ProgressTracker.STAGES}
+    assert labels.isdisjoint(_ENGLISH_LABELS), f"English labels still in STAGES: {labels & _ENGLISH_LABELS}"
 
 
 def test_progress_tracker_build_text_no_english():
@@ -81,3 +86,58 @@ def test_progress_tracker_supabase_build_text_excludes_start():
     assert TEXT["load_model"] in text
     assert TEXT["simulation"] in text
     assert TEXT["done"] in text
+
+
+# ---------- ProgressTracker: edit throttling ----------
+
+def test_progress_tracker_coalesces_rapid_updates():
+    """Updates inside the edit window collapse into a single edit."""
+    tracker = ProgressTracker()
+    tracker.message_id = 1
+    with mock.patch("app.telegram_bot.edit_message") as edit:
+        for i in range(5):
+            tracker.set_game_progress(f"game {i}")
+        tracker.finish()
+    edit.assert_called_once()
+    assert "game 4" in edit.call_args[0][1]
+    assert tracker._pending is None
+
+
+def test_progress_tracker_skips_identical_text():
+    """No edit is sent when the rendered text has not changed."""
+    tracker = ProgressTracker()
+    tracker.message_id = 1
+    with mock.patch("app.telegram_bot.edit_message") as edit:
+        tracker.finish()
+        tracker.finish()
+    edit.assert_called_once()
+
+
+def test_progress_tracker_flushes_pending_edit_at_exit():
+    """A pending edit is registered with atexit and unregistered once sent."""
+    tracker = ProgressTracker()
+    tracker.message_id = 1
+    with mock.patch("app.telegram_bot.atexit") as fake_atexit:
+        with mock.patch("app.telegram_bot.edit_message") as edit:
+            tracker.set_game_progress("game 0")
+            fake_atexit.register.assert_called_once_with(tracker._flush_edit)
+            exit_hook = fake_atexit.register.call_args[0][0]
+            exit_hook()
+            fake_atexit.unregister.assert_called_once_with(tracker._flush_edit)
+    edit.assert_called_once()
+    assert "game 0" in edit.call_args[0][1]
+    assert tracker._pending is None
+
+
+# ---------- control_panel_markup ----------
+
+def test_control_panel_markup_is_fresh_and_reads_env(monkeypatch):
+    """Each call builds a new markup from the current GITHUB_PAGES_URL."""
+    from app.telegram_bot import control_panel_markup
+
+    monkeypatch.setenv("GITHUB_PAGES_URL", "https://example.test/")
+    first = control_panel_markup()
+    first["inline_keyboard"].append([{"text": "extra", "url": "https://x"}])
+    second = control_panel_markup()
+    assert len(second["inline_keyboard"]) == 3
+    assert second["inline_keyboard"][0][0]["url"] == "https://example.test/?action=predict"
@@ -2,36 +2,35 @@
 from __future__ import annotations
 
 import json
-import os
 import sqlite3
 from pathlib import Path
-from unittest import mock
 
 import pytest
 
-os.environ.pop("SUPABASE_URL", None)
-os.environ.pop("SUPABASE_KEY", None)
-
 from app import supabase_client
-from app.database import get_conn, init_db, insert_prediction, DB_PATH
-from app.prediction_models import MODEL_DIR, MODEL_FILES, VERSION_FILE, _current_version
+from app.database import get_conn, init_db, insert_prediction
 
 
-@pytest.fixture(autouse=True)
-def _reset_supabase():
-    supabase_client._client = None
-    supabase_client._available = None
-    yield
-    supabase_client._client = None
-    supabase_client._available = None
+@pytest.fixture(scope="session")
+def _db_template(tmp_path_factory):
+    """Run init_db() once and keep the resulting empty database image."""
+    db_file = tmp_path_factory.mktemp("db") / "template.sqlite"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("app.database.DB_PATH", db_file)
+        init_db()
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.serialize()
+    finally:
+        conn.close()
 
 
 @pytest.fixture()
-def _fresh_db(tmp_path, monkeypatch):
-    """Create a fresh in-memory–style SQLite DB for each test."""
+def _fresh_db(_db_template, tmp_path, monkeypatch):
+    """Create a fresh SQLite DB for each test from the session's schema image."""
     db_file = tmp_path / "test.sqlite"
+    db_file.write_bytes(_db_template)
     monkeypatch.setattr("app.database.DB_PATH", db_file)
-    init_db()
     yield db_file
 
 
@@ -39,12 +38,14 @@ def _fresh_db(tmp_path, monkeypatch):
 
 def test_current_version_returns_unknown_when_no_file(tmp_path, monkeypatch):
     """Without model_version.json, _current_version returns 'unknown' (not v1)."""
+    from app.prediction_models import _current_version
     monkeypatch.setattr("app.prediction_models.VERSION_FILE", tmp_path / "model_version.json")
     assert _current_version() == "unknown"
 
 
 def test_current_version_reads_from_json(tmp_path, monkeypatch):
     """With model_version.json, _current_version returns the stored version."""
+    from app.prediction_models import _current_version
     vf = tmp_path / "model_version.json"
     vf.write_text(json.dumps({"version": "v5"}))
     monkeypatch.setattr("app.prediction_models.VERSION_FILE", vf)
@@ -55,6 +56,7 @@ def test_current_version_reads_from_json(tmp_path, monkeypatch):
 
 def test_model_files_constant():
     """MODEL_FILES lists the four expected model file names."""
+    from app.prediction_models import MODEL_FILES
     assert MODEL_FILES == ("home_model.pkl", "away_model.pkl", "spread_model.pkl", "total_model.pkl")
 
 
@@ -126,50 +128,84 @@ def test_insert_prediction_new_game_is_final(_fresh_db):
     assert row["is_final_prediction"] == 1
 
 
+def test_insert_prediction_details_json_encoding(_fresh_db):
+    """details_json stays valid JSON: NaN becomes null, numpy values become numbers."""
+    import numpy as np
+
+    row = {
+        "game_id": 300,
+        "prediction_time": "2025-01-15T12:00:00",
+        "spread_pick": "home_cover",
+        "spread_prob": 0.6,
+        "total_pick": "over",
+        "total_prob": 0.55,
+        "confidence_score": 0.1,
+        "star_rating": 3,
+        "recommendation_index": 0.5,
+        "expected_home_score": 110.0,
+        "expected_visitor_score": 105.0,
+        "simulation_variance": 64.0,
+        "details": {
+            "edge": float("nan"),
+            "mean": np.float64(1.5),
+            "runs": np.int64(10000),
+            "margins": np.array([1.0, -2.5]),
+            1: "int key",
+            "team": "湖人",
+        },
+    }
+    insert_prediction("2025-01-15", row)
+
+    with get_conn() as conn:
+        raw = conn.execute(
+            "SELECT details_json FROM predictions_snapshot WHERE game_id=300"
+        ).fetchone()["details_json"]
+
+    assert "NaN" not in raw
+    assert "湖人" in raw
+    assert json.loads(raw) == {
+        "edge": None,
+        "mean": 1.5,
+        "runs": 10000,
+        "margins": [1.0, -2.5],
+        "1": "int key",
+        "team": "湖人",
+    }
+
+
 # ---------- supabase_client: is_final_prediction in save_prediction ----------
 
-def test_save_prediction_payload_contains_is_final():
+def test_save_prediction_payload_contains_is_final(fake_supabase_client):
     """save_prediction includes is_final_prediction=True in payload."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
-
     supabase_client.save_prediction({"game_id": 42})
 
-    inserted = fake_client.table.return_value.insert.call_args[0][0]
+    inserted = fake_supabase_client.table.return_value.insert.call_args[0][0]
     payload = inserted["payload"]
     assert payload["is_final_prediction"] is True
 
 
-def test_save_prediction_includes_is_final_flag():
+def test_save_prediction_includes_is_final_flag(fake_supabase_client):
     """save_prediction sets is_final_prediction=True in the payload."""
-    fake_client = mock.MagicMock()
-    supabase_client._client = fake_client
-    supabase_client._available = True
-
     supabase_client.save_prediction({"game_id": 42})
 
-    inserted = fake_client.table.return_value.insert.call_args[0][0]
+    inserted = fake_supabase_client.table.return_value.insert.call_args[0][0]
     payload = inserted["payload"]
     assert payload["is_final_prediction"] is True
 
 
 # ---------- supabase_client: fetch_latest_training_metrics ----------
 
-def test_fetch_latest_training_metrics_returns_payload():
+def test_fetch_latest_training_metrics_returns_payload(fake_supabase_client):
     """fetch_latest_training_metrics returns the payload from latest training log."""
-    fake_client = mock.MagicMock()
-    fake_client.table.return_value.select.return_value.order.return_value.limit.return_value.execute.return_value.data = [
+    fake_supabase_client.table.return_value.select.return_value.order.return_value.limit.return_value.execute.return_value.data = [
         {"payload": {"home_mae": 4.5, "data_points": 500}}
     ]
-    supabase_client._client = fake_client
-    supabase_client._available = True
 
     result = supabase_client.fetch_latest_training_metrics()
     assert result == {"home_mae": 4.5, "data_points": 500}
 
 
-def test_fetch_latest_training_metrics_returns_none_when_unavailable():
+def test_fetch_latest_training_metrics_returns_none_when_unavailable(reset_supabase_client):
     """fetch_latest_training_metrics returns None when Supabase is not configured."""
     supabase_client._available = False
     assert supabase_client.fetch_latest_training_metrics() is None